@@ -0,0 +1,38 @@
+from django.contrib import admin
+
+from .models import OutgoingEmail, Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'status',
+        'priority',
+        'attempts',
+        'run_at',
+        'finished',
+    )
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'idempotency_key')
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Task, TaskAdmin)
+
+
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'subject',
+        'status',
+        'attempts',
+        'created',
+        'sent',
+    )
+    list_filter = ('status',)
+    search_fields = ('subject',)
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        # Регистрируем фоновые задачи из модулей tasks всех приложений.
+        autodiscover_modules('tasks')
+        # И фрагменты страниц для кэша core.page_cache.
+        autodiscover_modules('fragments')
+        from . import mail  # noqa: F401
@@ -0,0 +1,262 @@
+"""Запуск WSGI-приложения Django под ASGI-сервером.
+
+Django 2.2 не умеет ASGI, поэтому обычные запросы передаются в WSGI-
+приложение в ограниченном пуле потоков, а асинхронные обработчики
+(например, поток server-sent events) подключаются маршрутами в Router.
+Асинхронные представления (AsyncViews) получают обычный HttpRequest:
+middleware на основе MiddlewareMixin выполняются для них в пуле.
+Ответы буферизуются целиком.
+"""
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.exception import response_for_exception
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import Resolver404, resolve
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.module_loading import import_string
+
+from yatube.settings import ASGI
+
+executor = ThreadPoolExecutor(ASGI['THREADS'], thread_name_prefix='asgi')
+
+
+def check_connections():
+    """Закрывает соединения текущего потока, которые сломаны, оставлены
+    в транзакции или старше заданного CONN_MAX_AGE.
+
+    Потоки пулов живут всё время работы процесса, поэтому при
+    CONN_MAX_AGE=0 их соединения не закрываются после каждого вызова,
+    как в конце обычного запроса: иначе асинхронная страница из
+    нескольких вызовов run_sync платила бы за новое соединение на
+    каждый. Таких соединений не больше, чем потоков в пулах.
+    """
+    for connection in connections.all():
+        if connection.settings_dict['CONN_MAX_AGE'] == 0:
+            connection.close_at = None
+        connection.close_if_unusable_or_obsolete()
+
+
+def call_in_thread(func, *args, **kwargs):
+    try:
+        return func(*args, **kwargs)
+    finally:
+        check_connections()
+
+
+async def run_sync(func, *args, **kwargs):
+    """Выполняет синхронную функцию (например, запрос к БД) в пуле."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor, partial(call_in_thread, func, *args, **kwargs)
+    )
+
+
+async def gather(*calls):
+    """Асинхронный вариант core.parallel.gather: функции без аргументов
+    calls выполняются в пуле одновременно.
+    """
+    return await asyncio.gather(*(run_sync(call) for call in calls))
+
+
+def build_environ(scope, body):
+    """WSGI environ по ASGI scope HTTP-запроса."""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f'HTTP/{scope["http_version"]}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        if name in environ:
+            separator = '; ' if name == 'HTTP_COOKIE' else ','
+            value = environ[name] + separator + value
+        environ[name] = value
+    return environ
+
+
+async def read_body(receive):
+    """Тело запроса; None, если клиент отключился."""
+    body = b''
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def send_response(send, status, headers, content):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': headers,
+    })
+    await send({'type': 'http.response.body', 'body': content})
+
+
+class WsgiToAsgi:
+    """ASGI-приложение, выполняющее WSGI-приложение в пуле потоков."""
+
+    def __init__(self, wsgi_application):
+        self.wsgi_application = wsgi_application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await lifespan(receive, send)
+        body = await read_body(receive)
+        if body is None:
+            return
+        await send_response(
+            send, *await run_sync(self.run, build_environ(scope, body))
+        )
+
+    def run(self, environ):
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ]
+
+        result = self.wsgi_application(environ, start_response)
+        try:
+            content = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return response['status'], response['headers'], content
+
+
+class Router:
+    """Передаёт HTTP-запросы к путям из routes асинхронным
+    обработчикам, а остальные — приложению default.
+    """
+
+    def __init__(self, routes, default):
+        self.routes = routes
+        self.default = default
+
+    async def __call__(self, scope, receive, send):
+        handler = self.default
+        if scope['type'] == 'http':
+            handler = self.routes.get(scope['path'], self.default)
+        return await handler(scope, receive, send)
+
+
+class AsyncViews:
+    """Выполняет GET-запросы к маршрутам Django из views (имя маршрута
+    -> асинхронная функция) без WSGI; остальные запросы передаются
+    приложению default.
+    """
+
+    def __init__(self, views, default):
+        self.views = views
+        self.default = default
+        self.middleware = []
+        for path in settings.MIDDLEWARE:
+            middleware = import_string(path)
+            if not issubclass(middleware, MiddlewareMixin):
+                continue
+            try:
+                self.middleware.append(middleware())
+            except MiddlewareNotUsed:
+                pass
+
+    async def __call__(self, scope, receive, send):
+        view = match = None
+        if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD'):
+            try:
+                match = resolve(scope['path'])
+            except Resolver404:
+                pass
+            else:
+                view = self.views.get(match.view_name)
+        if view is None:
+            return await self.default(scope, receive, send)
+        body = await read_body(receive)
+        if body is None:
+            return
+        request = WSGIRequest(build_environ(scope, body))
+        request.resolver_match = match
+        response = await run_sync(self.start, request, view, match)
+        if response is None:
+            try:
+                response = await view(request, *match.args, **match.kwargs)
+            except Exception as error:
+                response = await run_sync(
+                    response_for_exception, request, error
+                )
+        await send_response(
+            send, *await run_sync(self.finish, request, response)
+        )
+
+    def start(self, request, view, match):
+        for middleware in self.middleware:
+            if hasattr(middleware, 'process_request'):
+                response = middleware.process_request(request)
+                if response is not None:
+                    return response
+        for middleware in self.middleware:
+            if hasattr(middleware, 'process_view'):
+                response = middleware.process_view(
+                    request, view, match.args, match.kwargs
+                )
+                if response is not None:
+                    return response
+        return None
+
+    def finish(self, request, response):
+        for middleware in reversed(self.middleware):
+            if hasattr(middleware, 'process_response'):
+                response = middleware.process_response(request, response)
+        headers = [
+            (name.encode('latin-1'), value.encode('latin-1'))
+            for name, value in response.items()
+        ]
+        headers += [
+            (b'set-cookie', cookie.output(header='').strip().encode())
+            for cookie in response.cookies.values()
+        ]
+        if response.streaming:
+            content = b''.join(response.streaming_content)
+        else:
+            content = response.content
+        response.close()
+        return response.status_code, headers, content
@@ -0,0 +1,320 @@
+"""Двухуровневый кэш: небольшой LRU в памяти процесса перед общим
+кэшем.
+
+Бэкенд TwoTierCache читает ключи с префиксами из OPTIONS['L1_PREFIXES']
+сначала из памяти процесса (L1), затем из кэша OPTIONS['L2'] и
+запоминает найденное в L1 не дольше OPTIONS['L1_TIMEOUT'] секунд.
+Остальные ключи, а также add, incr и decr (блокировки и счётчики)
+всегда идут в L2.
+
+Перезапись и удаление ключа из L1 записывают его в журнал
+инвалидаций в L2 (счётчик и по записи на номер), а каждый процесс не
+реже раза в OPTIONS['SYNC_INTERVAL'] секунд читает новые записи
+журнала и выбрасывает из своего L1 только перечисленные ключи. Поэтому
+другие процессы видят изменение с задержкой не больше SYNC_INTERVAL,
+а тот, что записал, — сразу. Запись ключа, которого, как процесс только
+что видел, в L2 не было (обычный промах кэша), в журнал не попадает:
+в L1 других процессов такого ключа быть не может.
+
+Счётчики попаданий по уровням возвращает stats().
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SEQUENCE_KEY = 'two_tier:sequence'
+MISSING = object()
+
+
+def log_key(number):
+    return f'two_tier:invalidated:{number}'
+
+
+# Django создаёт экземпляр бэкенда в каждом потоке, поэтому L1 хранится
+# на уровне модуля, как в LocMemCache.
+tiers = {}
+tiers_lock = threading.Lock()
+
+
+class LocalTier:
+    """LRU-хранилище L1 с ограничением числа записей и их срока."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        # Ключи, которых не оказалось в L2, и до какого времени это
+        # считается известным.
+        self.missed = OrderedDict()
+        self.sequence = None
+        self.checked = None
+        self.counts = {
+            'l1_hits': 0, 'l1_misses': 0, 'l2_hits': 0, 'l2_misses': 0
+        }
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.counts['l1_hits'] += 1
+                return pickle.loads(entry[1])
+            if entry is not None:
+                del self.entries[key]
+            self.counts['l1_misses'] += 1
+            return MISSING
+
+    def set(self, key, value, timeout):
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.entries[key] = (time.monotonic() + timeout, pickled)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def discard(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def miss(self, key, timeout):
+        with self.lock:
+            self.missed[key] = time.monotonic() + timeout
+            self.missed.move_to_end(key)
+            while len(self.missed) > self.max_entries:
+                self.missed.popitem(last=False)
+
+    def was_missing(self, key):
+        """Видел ли процесс недавно, что ключа key нет в L2."""
+        with self.lock:
+            deadline = self.missed.pop(key, None)
+        return deadline is not None and deadline > time.monotonic()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.missed.clear()
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counts[name] += value
+
+
+class TwoTierCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.l2_alias = options['L2']
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+        self.sync_interval = options.get('SYNC_INTERVAL', 1)
+        prefixes = options.get('L1_PREFIXES')
+        self.l1_prefixes = tuple(prefixes) if prefixes is not None else None
+        with tiers_lock:
+            self.tier = tiers.setdefault(
+                location, LocalTier(self._max_entries)
+            )
+
+    @property
+    def l2(self):
+        return caches[self.l2_alias]
+
+    def cached_locally(self, key):
+        return self.l1_prefixes is None or key.startswith(self.l1_prefixes)
+
+    def local_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self.l1_timeout
+        return min(timeout, self.l1_timeout)
+
+    def sync(self):
+        """Выбрасывает из L1 ключи, изменённые другими процессами."""
+        now = time.monotonic()
+        tier = self.tier
+        checked = tier.checked
+        if checked is not None and now - checked < self.sync_interval:
+            return
+        sequence = self.l2.get(SEQUENCE_KEY, 0)
+        seen = tier.sequence
+        tier.checked = now
+        if sequence == seen:
+            return
+        if (
+            seen is None
+            or sequence < seen
+            # Записи L1 старше L1_TIMEOUT всё равно истекли.
+            or now - checked > self.l1_timeout
+        ):
+            tier.clear()
+        else:
+            numbers = range(seen + 1, sequence + 1)
+            logged = self.l2.get_many([log_key(n) for n in numbers])
+            if len(logged) < len(numbers):
+                # Запись журнала вытеснена или ещё не сохранена.
+                tier.clear()
+            else:
+                for keys in logged.values():
+                    tier.discard(*keys)
+        tier.sequence = sequence
+
+    def invalidate(self, keys):
+        """Записывает ключи keys в журнал для других процессов."""
+        try:
+            number = self.l2.incr(SEQUENCE_KEY)
+        except ValueError:
+            self.l2.add(SEQUENCE_KEY, 0, None)
+            number = self.l2.incr(SEQUENCE_KEY)
+        # Журнал нужен, пока в L1 могут жить записи, прочитанные до
+        # изменения.
+        self.l2.set(
+            log_key(number),
+            keys,
+            self.l1_timeout + self.sync_interval + 1,
+        )
+        tier = self.tier
+        if tier.sequence is not None and number == tier.sequence + 1:
+            # Своя запись: L1 этого процесса уже обновлён.
+            tier.sequence = number
+
+    def written(self, keys, version):
+        """Обновляет журнал после записи ключей keys в L2."""
+        changed = [
+            made for made in (self.make_key(key, version) for key in keys)
+            if not self.tier.was_missing(made)
+        ]
+        if changed:
+            self.invalidate(changed)
+
+    def get(self, key, default=None, version=None):
+        local = self.cached_locally(key)
+        if local:
+            self.sync()
+            value = self.tier.get(self.make_key(key, version))
+            if value is not MISSING:
+                return value
+        value = self.l2.get(key, MISSING, version)
+        if value is MISSING:
+            self.tier.count('l2_misses')
+            if local:
+                self.tier.miss(self.make_key(key, version), self.l1_timeout)
+            return default
+        self.tier.count('l2_hits')
+        if local:
+            self.store_locally(key, value, DEFAULT_TIMEOUT, version)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        remote = []
+        self.sync()
+        for key in keys:
+            if self.cached_locally(key):
+                value = self.tier.get(self.make_key(key, version))
+                if value is not MISSING:
+                    found[key] = value
+                    continue
+            remote.append(key)
+        if remote:
+            values = self.l2.get_many(remote, version)
+            self.tier.count('l2_hits', len(values))
+            self.tier.count('l2_misses', len(remote) - len(values))
+            for key in remote:
+                if not self.cached_locally(key):
+                    continue
+                if key in values:
+                    self.store_locally(
+                        key, values[key], DEFAULT_TIMEOUT, version
+                    )
+                else:
+                    self.tier.miss(
+                        self.make_key(key, version), self.l1_timeout
+                    )
+            found.update(values)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l2.set(key, value, timeout, version)
+        if self.cached_locally(key):
+            self.sync()
+            self.store_locally(key, value, timeout, version)
+            self.written([key], version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.l2.set_many(data, timeout, version)
+        local = [key for key in data if self.cached_locally(key)]
+        if local:
+            self.sync()
+        for key in local:
+            self.store_locally(key, data[key], timeout, version)
+        self.written(local, version)
+        return failed
+
+    def store_locally(self, key, value, timeout, version):
+        timeout = self.local_timeout(timeout)
+        if timeout > 0:
+            self.tier.set(self.make_key(key, version), value, timeout)
+        else:
+            self.tier.discard(self.make_key(key, version))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # Добавляется только отсутствующий в L2 ключ, которого нет
+        # и в L1 других процессов, поэтому журнал не нужен.
+        return self.l2.add(key, value, timeout, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.l2.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self.l2.delete(key, version)
+        self.forget([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.l2.delete_many(keys, version)
+        self.forget(keys, version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.l2.incr(key, delta, version)
+        self.forget([key], version)
+        return value
+
+    def decr(self, key, delta=1, version=None):
+        value = self.l2.decr(key, delta, version)
+        self.forget([key], version)
+        return value
+
+    def forget(self, keys, version):
+        local = [
+            self.make_key(key, version)
+            for key in keys if self.cached_locally(key)
+        ]
+        if local:
+            self.tier.discard(*local)
+            self.invalidate(local)
+
+    def has_key(self, key, version=None):
+        return self.get(key, MISSING, version) is not MISSING
+
+    def clear(self):
+        # Вместе с L2 очищается и журнал: другие процессы увидят, что
+        # счётчик уменьшился, и очистят свой L1 целиком.
+        self.l2.clear()
+        self.tier.clear()
+        self.tier.sequence = None
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
+
+    def stats(self):
+        """Число попаданий и промахов по уровням и доля попаданий."""
+        counts = dict(self.tier.counts)
+        for tier in ('l1', 'l2'):
+            total = counts[f'{tier}_hits'] + counts[f'{tier}_misses']
+            counts[f'{tier}_ratio'] = (
+                counts[f'{tier}_hits'] / total if total else None
+            )
+        counts['l1_entries'] = len(self.tier.entries)
+        return counts
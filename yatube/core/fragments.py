@@ -0,0 +1,9 @@
+from django.template.loader import render_to_string
+
+from .page_cache import fragment
+
+
+@fragment('header_user')
+def header_user(request):
+    """Ссылки шапки, зависящие от пользователя."""
+    return render_to_string('includes/header_user.html', request=request)
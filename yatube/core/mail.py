@@ -0,0 +1,161 @@
+"""Отложенная отправка почты.
+
+QueuedEmailBackend только сохраняет письма в таблицу OutgoingEmail и
+ставит в очередь задачу core.deliver_mail. Задача забирает письма
+пачками и отправляет их через MAIL_QUEUE['BACKEND'] по одному
+соединению, поэтому обработчик запроса никогда не ждёт SMTP-сервер.
+Письмо, которое не удалось отправить, откладывается с растущей
+задержкой, а после MAIL_QUEUE['MAX_ATTEMPTS'] попыток помечается
+ошибочным и больше не мешает остальным.
+"""
+import base64
+import datetime as dt
+import json
+import logging
+import traceback
+import uuid
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+from yatube.settings import MAIL_QUEUE, TASKS
+
+from .models import OutgoingEmail, Task
+from .tasks import backoff, enqueue, task
+
+logger = logging.getLogger(__name__)
+
+
+def dump_attachment(attachment):
+    """Вложение (filename, content, mimetype) с содержимым в base64."""
+    if not isinstance(attachment, tuple):
+        raise ValueError(
+            'Вложения MIMEBase не поддерживаются отложенной отправкой.'
+        )
+    filename, content, mimetype = attachment
+    if isinstance(content, str):
+        content = content.encode()
+    return [filename, base64.b64encode(content).decode(), mimetype]
+
+
+def dump_message(message):
+    """Сериализует письмо вместе с вложениями."""
+    return json.dumps({
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+        'attachments': [
+            dump_attachment(attachment)
+            for attachment in message.attachments
+        ],
+    })
+
+
+def load_message(data, connection=None):
+    data = json.loads(data)
+    data['attachments'] = [
+        (filename, base64.b64decode(content), mimetype)
+        for filename, content, mimetype in data.get('attachments', [])
+    ]
+    return EmailMultiAlternatives(connection=connection, **data)
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Почтовый бэкенд, откладывающий отправку в фоновую задачу."""
+
+    def send_messages(self, email_messages):
+        if not email_messages:
+            return 0
+        OutgoingEmail.objects.bulk_create(
+            OutgoingEmail(
+                subject=message.subject[:255],
+                message=dump_message(message),
+            )
+            for message in email_messages
+        )
+        enqueue(deliver_mail, unique=True)
+        return len(email_messages)
+
+
+def claim_batch(token, size):
+    """Помечает меткой token до size писем из очереди."""
+    now = timezone.now()
+    # Письма упавшего воркера возвращаются в очередь.
+    OutgoingEmail.objects.filter(
+        status=OutgoingEmail.SENDING,
+        claimed__lt=now - dt.timedelta(seconds=TASKS['LOCK_TIMEOUT']),
+    ).update(status=OutgoingEmail.QUEUED, token='')
+    ids = list(OutgoingEmail.objects.filter(
+        status=OutgoingEmail.QUEUED, run_at__lte=now
+    ).values_list('pk', flat=True)[:size])
+    OutgoingEmail.objects.filter(
+        pk__in=ids, status=OutgoingEmail.QUEUED
+    ).update(status=OutgoingEmail.SENDING, token=token, claimed=now)
+    return list(OutgoingEmail.objects.filter(
+        token=token, status=OutgoingEmail.SENDING
+    ))
+
+
+def mark_failed(email, error):
+    """Откладывает письмо, которое не удалось отправить, или помечает
+    его ошибочным после MAIL_QUEUE['MAX_ATTEMPTS'] попыток.
+    """
+    attempts = email.attempts + 1
+    logger.warning('Email #%s failed (attempt %s)', email.pk, attempts)
+    if attempts >= MAIL_QUEUE['MAX_ATTEMPTS']:
+        status, run_at = OutgoingEmail.FAILED, email.run_at
+    else:
+        status = OutgoingEmail.QUEUED
+        run_at = timezone.now() + dt.timedelta(seconds=backoff(attempts))
+    OutgoingEmail.objects.filter(pk=email.pk).update(
+        status=status,
+        attempts=attempts,
+        last_error=error,
+        run_at=run_at,
+        token='',
+    )
+
+
+def schedule_retry():
+    """Ставит задачу отправки на время ближайшего отложенного письма."""
+    run_at = OutgoingEmail.objects.filter(
+        status=OutgoingEmail.QUEUED
+    ).order_by('run_at').values_list('run_at', flat=True).first()
+    if run_at is not None:
+        delay = max((run_at - timezone.now()).total_seconds(), 0)
+        enqueue(deliver_mail, delay=delay, unique=True)
+
+
+@task('core.deliver_mail', priority=Task.HIGH)
+def deliver_mail():
+    """Отправляет письма из очереди по одному соединению."""
+    token = uuid.uuid4().hex
+    connection = get_connection(MAIL_QUEUE['BACKEND'])
+    try:
+        with connection:
+            while True:
+                emails = claim_batch(token, MAIL_QUEUE['BATCH_SIZE'])
+                if not emails:
+                    break
+                for email in emails:
+                    try:
+                        load_message(email.message, connection).send()
+                    except Exception:
+                        mark_failed(email, traceback.format_exc())
+                        continue
+                    OutgoingEmail.objects.filter(pk=email.pk).update(
+                        status=OutgoingEmail.SENT, sent=timezone.now()
+                    )
+    finally:
+        # Неотправленные письма вернутся в очередь при повторе задачи.
+        OutgoingEmail.objects.filter(
+            token=token, status=OutgoingEmail.SENDING
+        ).update(status=OutgoingEmail.QUEUED, token='')
+    schedule_retry()
@@ -0,0 +1,97 @@
+import asyncio
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from core.asgi import build_environ
+from core.single_flight import metrics
+
+
+def http_scope(path, query_string):
+    return {
+        'type': 'http',
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'query_string': query_string.encode(),
+        'headers': [(b'host', b'localhost')],
+        'server': ('localhost', 80),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность WSGI- и ASGI-приложений '
+        'при конкурентных запросах к одной странице (внутри процесса, '
+        'без сети).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/')
+        parser.add_argument('--query', default='')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=20)
+
+    def handle(self, *args, **options):
+        from yatube.asgi import application, wsgi_application
+        scope = http_scope(options['path'], options['query'])
+        total = options['requests']
+        concurrency = options['concurrency']
+
+        def wsgi_request(_):
+            statuses = []
+            result = wsgi_application(
+                build_environ(scope, b''),
+                lambda status, headers, exc_info=None: statuses.append(
+                    status
+                ),
+            )
+            b''.join(result)
+            result.close()
+            return int(statuses[0].split()[0])
+
+        before = metrics()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            statuses = list(pool.map(wsgi_request, range(total)))
+        self.report('WSGI', statuses, time.perf_counter() - started, before)
+
+        async def asgi_request(semaphore):
+            sent = []
+
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                sent.append(message)
+
+            async with semaphore:
+                await application(scope, receive, send)
+            return sent[0]['status']
+
+        async def asgi_load():
+            semaphore = asyncio.Semaphore(concurrency)
+            return await asyncio.gather(
+                *(asgi_request(semaphore) for _ in range(total))
+            )
+
+        before = metrics()
+        started = time.perf_counter()
+        statuses = asyncio.run(asgi_load())
+        self.report('ASGI', statuses, time.perf_counter() - started, before)
+        if hasattr(cache, 'stats'):
+            self.stdout.write(f'Кэш: {cache.stats()}')
+
+    def report(self, name, statuses, elapsed, before):
+        after = metrics()
+        flights = {key: after[key] - before[key] for key in after}
+        self.stdout.write(
+            f'{name}: {len(statuses) / elapsed:.1f} запросов/с, '
+            f'{elapsed * 1000 / len(statuses):.2f} мс на запрос, '
+            f'ответы: {dict(Counter(statuses))}, '
+            f'объединение запросов: {flights}'
+        )
@@ -0,0 +1,88 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.models import Task
+from yatube.settings import TASKS
+
+LANES = {
+    'high': Task.HIGH,
+    'default': Task.DEFAULT,
+    'low': Task.LOW,
+}
+
+
+def init_worker():
+    django.setup()
+    connections.close_all()
+
+
+def work(priorities, once, poll_interval):
+    """Цикл воркера: выполняет готовые задачи, пока они есть."""
+    from core.tasks import run_pending
+    done = 0
+    while True:
+        count = run_pending(priorities)
+        done += count
+        if not count:
+            if once:
+                return done
+            time.sleep(poll_interval)
+
+
+class Command(BaseCommand):
+    help = 'Запускает процессы, выполняющие фоновые задачи из очереди.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=TASKS['WORKERS'],
+            help='Количество процессов-воркеров.',
+        )
+        parser.add_argument(
+            '--lanes',
+            default=','.join(LANES),
+            help='Приоритеты задач через запятую: high, default, low.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и завершиться.',
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Показать статистику очереди и завершиться.',
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            from core.tasks import metrics
+            for name, counts in sorted(metrics().items()):
+                self.stdout.write(f'{name}: {counts}')
+            return
+        try:
+            priorities = [
+                LANES[lane.strip()] for lane in options['lanes'].split(',')
+            ]
+        except KeyError as error:
+            raise CommandError(f'Неизвестный приоритет {error}')
+        processes = options['processes']
+        # Соединение с БД не должно переходить в дочерние процессы.
+        connections.close_all()
+        with ProcessPoolExecutor(processes, initializer=init_worker) as pool:
+            futures = [
+                pool.submit(
+                    work,
+                    priorities,
+                    options['once'],
+                    TASKS['POLL_INTERVAL'],
+                )
+                for _ in range(processes)
+            ]
+            done = sum(future.result() for future in futures)
+        self.stdout.write(f'Выполнено задач: {done}')
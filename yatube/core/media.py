@@ -0,0 +1,75 @@
+"""Разбор заголовков для отдачи файлов по частям.
+
+Поддерживается один диапазон байтов в Range; запрос нескольких
+диапазонов обслуживается целым файлом, как допускает RFC 7233.
+"""
+import re
+
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def file_etag(info):
+    return f'"{info.st_size:x}-{info.st_mtime_ns:x}"'
+
+
+def file_last_modified(info):
+    return http_date(info.st_mtime)
+
+
+def etag_matches(if_none_match, etag):
+    """Совпадает ли ETag с одним из тегов If-None-Match. Как требует
+    RFC 7232, теги сравниваются слабо, а '*' совпадает с любым.
+    """
+    etags = parse_etags(if_none_match)
+    if '*' in etags:
+        return True
+    return strip_weak(etag) in (strip_weak(tag) for tag in etags)
+
+
+def strip_weak(etag):
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def parse_range(header, size):
+    """Пара (start, end) включительно; None — отдать весь файл,
+    ValueError — диапазон вне файла.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if match is None:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError('Диапазон вне файла')
+    return start, end
+
+
+def range_applies(if_range, etag, info):
+    """Совпадает ли валидатор If-Range с текущей версией файла."""
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(info.st_mtime) <= since
+
+
+def iter_range(file, start, length, chunk_size):
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
@@ -0,0 +1,183 @@
+import mimetypes
+import os
+import stat
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.http import parse_etags
+
+from yatube.settings import PAGE_CACHE, STATIC_SERVE
+
+from . import page_cache
+from .media import file_etag, file_last_modified
+
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def parse_accept_encoding(header):
+    """Словарь кодировка -> q из заголовка Accept-Encoding."""
+    accepted = {}
+    for item in header.split(','):
+        name, *params = [part.strip() for part in item.split(';')]
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.lower()] = quality
+    return accepted
+
+
+def variant_etag(etag, encoding):
+    """ETag сжатой копии: у каждого представления файла он свой."""
+    if encoding is None:
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+class StaticFile:
+    def __init__(self, path, immutable):
+        self.path = path
+        self.immutable = immutable
+        self.content_type = (
+            mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        )
+        self.variants = {}
+        for encoding, extension in ENCODINGS + ((None, ''),):
+            try:
+                info = os.stat(path + extension)
+            except FileNotFoundError:
+                continue
+            if stat.S_ISREG(info.st_mode):
+                self.variants[encoding] = (path + extension, info)
+        _, info = self.variants[None]
+        self.etag = file_etag(info)
+        self.last_modified = file_last_modified(info)
+
+    def choose(self, accept_encoding):
+        """Кодировка с наибольшим q среди имеющихся копий; при равных q
+        предпочтение по порядку ENCODINGS. None — файл без сжатия.
+        """
+        accepted = parse_accept_encoding(accept_encoding)
+        best, best_quality = None, 0.0
+        for encoding, _ in ENCODINGS:
+            if encoding not in self.variants:
+                continue
+            quality = accepted.get(encoding, accepted.get('*', 0.0))
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+
+class StaticFilesMiddleware(MiddlewareMixin):
+    """Отдаёт файлы STATIC_ROOT без обращения к представлениям.
+
+    Файлы с хешем в имени кэшируются браузером навсегда, остальные —
+    на STATIC_SERVE['MAX_AGE'] секунд. Если клиент принимает сжатые
+    ответы, отдаётся готовая копия .br или .gz. FileResponse передаёт
+    файл WSGI-серверу через wsgi.file_wrapper (sendfile).
+    """
+
+    def __init__(self, get_response=None):
+        if settings.DEBUG or not settings.STATIC_ROOT:
+            # В разработке статику отдаёт runserver.
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.prefix = settings.STATIC_URL
+        self.files = self.scan(settings.STATIC_ROOT)
+
+    def scan(self, root):
+        hashed = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        files = {}
+        compressed = tuple(extension for _, extension in ENCODINGS)
+        for directory, _, names in os.walk(root):
+            for name in names:
+                if name.endswith(compressed):
+                    continue
+                path = os.path.join(directory, name)
+                relative = os.path.relpath(path, root).replace(os.sep, '/')
+                files[self.prefix + relative] = StaticFile(
+                    path, relative in hashed
+                )
+        return files
+
+    def process_request(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        static_file = self.files.get(request.path_info)
+        if static_file is None:
+            return None
+        encoding = static_file.choose(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        etag = variant_etag(static_file.etag, encoding)
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        else:
+            path, info = static_file.variants[encoding]
+            response = FileResponse(
+                open(path, 'rb'), content_type=static_file.content_type
+            )
+            response['Content-Length'] = info.st_size
+            if encoding is not None:
+                response['Content-Encoding'] = encoding
+        response['Vary'] = 'Accept-Encoding'
+        response['ETag'] = etag
+        response['Last-Modified'] = static_file.last_modified
+        if static_file.immutable:
+            response['Cache-Control'] = (
+                'public, max-age=31536000, immutable'
+            )
+        else:
+            response['Cache-Control'] = (
+                f'public, max-age={STATIC_SERVE["MAX_AGE"]}'
+            )
+        return response
+
+
+class PageCacheMiddleware(MiddlewareMixin):
+    """Кэш целых страниц для анонимных читателей (core.page_cache).
+
+    Стоит после AuthenticationMiddleware, чтобы фрагменты видели
+    request.user, и после CsrfViewMiddleware, чтобы cookie с токеном,
+    выданным фрагментом, попала в ответ, но не в кэш.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not page_cache.cacheable_request(request):
+            return None
+        key = page_cache.page_key(request)
+        page = cache.get(key)
+        if page is None:
+            request.page_cache = key
+            return None
+        response = HttpResponse(
+            page_cache.fill(page['content'], request),
+            content_type=page['content_type'],
+        )
+        response['X-Page-Cache'] = 'hit'
+        return response
+
+    def process_response(self, request, response):
+        key = getattr(request, 'page_cache', None)
+        if key is None or response.streaming:
+            return response
+        charset = page_cache.charset(response)
+        content = response.content.decode(charset)
+        if page_cache.cacheable_response(response):
+            cache.set(key, {
+                'content': content,
+                'content_type': response['Content-Type'],
+            }, PAGE_CACHE['TIMEOUT'])
+            response['X-Page-Cache'] = 'miss'
+        response.content = page_cache.fill(content, request).encode(charset)
+        return response
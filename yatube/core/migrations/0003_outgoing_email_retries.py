@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:35
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Попытки'),
+        ),
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='last_error',
+            field=models.TextField(blank=True, verbose_name='Последняя ошибка'),
+        ),
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='run_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Отправить не раньше'),
+        ),
+        migrations.AlterField(
+            model_name='outgoingemail',
+            name='status',
+            field=models.CharField(choices=[('queued', 'В очереди'), ('sending', 'Отправляется'), ('sent', 'Отправлено'), ('failed', 'Ошибка')], default='queued', max_length=10, verbose_name='Состояние'),
+        ),
+    ]
@@ -0,0 +1,109 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    HIGH = 0
+    DEFAULT = 5
+    LOW = 9
+    PRIORITIES = (
+        (HIGH, 'Высокий'),
+        (DEFAULT, 'Обычный'),
+        (LOW, 'Низкий'),
+    )
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+    name = models.CharField('Задача', max_length=100)
+    payload = models.TextField('Аргументы', default='{}')
+    priority = models.PositiveSmallIntegerField(
+        'Приоритет',
+        choices=PRIORITIES,
+        default=DEFAULT,
+    )
+    status = models.CharField(
+        'Состояние',
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED,
+    )
+    idempotency_key = models.CharField(
+        'Ключ идемпотентности',
+        max_length=200,
+        blank=True,
+        null=True,
+        unique=True,
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Максимум попыток',
+        default=5,
+    )
+    run_at = models.DateTimeField('Запустить не раньше', default=timezone.now)
+    locked_until = models.DateTimeField(
+        'Занята до',
+        blank=True,
+        null=True,
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    started = models.DateTimeField('Начата', blank=True, null=True)
+    finished = models.DateTimeField('Завершена', blank=True, null=True)
+
+    class Meta:
+        ordering = ['priority', 'run_at']
+        indexes = [models.Index(fields=['status', 'priority', 'run_at'])]
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
+
+
+class OutgoingEmail(models.Model):
+    QUEUED = 'queued'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (SENDING, 'Отправляется'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Ошибка'),
+    )
+    subject = models.CharField('Тема', max_length=255)
+    message = models.TextField('Письмо')
+    status = models.CharField(
+        'Состояние',
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED,
+    )
+    token = models.CharField(
+        'Метка отправки',
+        max_length=32,
+        blank=True,
+        db_index=True,
+    )
+    claimed = models.DateTimeField('Взято в отправку', blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    run_at = models.DateTimeField('Отправить не раньше', default=timezone.now)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    sent = models.DateTimeField('Отправлено', blank=True, null=True)
+
+    class Meta:
+        ordering = ['pk']
+        indexes = [models.Index(fields=['status', 'id'])]
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+
+    def __str__(self):
+        return self.subject
@@ -0,0 +1,111 @@
+"""Кэш целых страниц для анонимных читателей.
+
+Страницы маршрутов PAGE_CACHE['VIEWS'] кэшируются по полному адресу
+для запросов без cookie из PAGE_CACHE['BYPASS_COOKIES'], то есть без
+сессии. Части страницы, зависящие от пользователя (ссылки в шапке,
+форма комментария, CSRF-токен), выводятся тегом {% hole %}: при
+рендере для кэша вместо них в страницу попадает метка, а перед отдачей
+каждого ответа метки заменяются фрагментами, отрисованными для текущего
+запроса. Фрагменты регистрируются декоратором fragment в модулях
+fragments приложений.
+
+Ключ страницы включает версию, которая увеличивается при изменении
+постов, комментариев, сообществ и подписок, поэтому кэш не показывает
+устаревшие ленты дольше, чем до следующего изменения.
+"""
+import base64
+import hashlib
+import json
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+
+from yatube.settings import PAGE_CACHE
+
+VERSION_KEY = 'page_cache:version'
+# Метка подписана, поэтому текст страницы не может её подделать.
+MARK = salted_hmac('core.page_cache', 'hole').hexdigest()[:16]
+HOLE_RE = re.compile(rf'<!--hole:{MARK}:([\w-]+):([\w=-]*)-->')
+
+fragments = {}
+
+
+def fragment(name):
+    """Регистрирует функцию (request, *args) -> str как фрагмент name."""
+    def decorator(func):
+        fragments[name] = func
+        return func
+    return decorator
+
+
+def hole(request, name, *args):
+    """Фрагмент name для запроса или метка на его месте, если страница
+    рисуется для кэша.
+    """
+    if getattr(request, 'page_cache', None) is not None:
+        payload = base64.urlsafe_b64encode(json.dumps(args).encode())
+        return f'<!--hole:{MARK}:{name}:{payload.decode()}-->'
+    return fragments[name](request, *args)
+
+
+def fill(content, request):
+    """Заменяет метки в content фрагментами для request."""
+    def replace(match):
+        name, payload = match.groups()
+        args = json.loads(base64.urlsafe_b64decode(payload))
+        return fragments[name](request, *args)
+    return HOLE_RE.sub(replace, content)
+
+
+def version():
+    # Начальная версия по времени, чтобы после вытеснения ключа
+    # не вернуться к версии уже закэшированных страниц.
+    return cache.get_or_set(VERSION_KEY, int(time.time()), None)
+
+
+def bump_version():
+    """Сбрасывает все закэшированные страницы."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        version()
+
+
+def page_key(request):
+    url = request.build_absolute_uri()
+    digest = hashlib.sha1(url.encode()).hexdigest()
+    return f'page_cache:{version()}:{request.method}:{digest}'
+
+
+def anonymous_request(request):
+    """Запрос без сессии: его ответ не зависит от пользователя."""
+    return not any(
+        cookie in request.COOKIES for cookie in PAGE_CACHE['BYPASS_COOKIES']
+    )
+
+
+def cacheable_request(request):
+    match = request.resolver_match
+    return (
+        request.method in ('GET', 'HEAD')
+        and match is not None
+        and match.view_name in PAGE_CACHE['VIEWS']
+        and anonymous_request(request)
+    )
+
+
+def cacheable_response(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and 'private' not in response.get('Cache-Control', '')
+        and 'no-store' not in response.get('Cache-Control', '')
+    )
+
+
+def charset(response):
+    return getattr(response, 'charset', None) or settings.DEFAULT_CHARSET
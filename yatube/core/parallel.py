@@ -0,0 +1,38 @@
+"""Параллельное выполнение независимых запросов к базе.
+
+Каждый поток пула работает со своим соединением, которое остаётся
+открытым между вызовами (см. core.asgi.check_connections). Внутри
+транзакции (в том числе в тестах) и для SQLite запросы выполняются
+последовательно в текущем потоке: другие соединения не видят
+незафиксированных данных, а SQLite не выполняет запросы параллельно.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+
+from yatube.settings import PARALLEL_QUERIES
+
+from .asgi import call_in_thread
+
+executor = ThreadPoolExecutor(
+    PARALLEL_QUERIES['THREADS'], thread_name_prefix='queries'
+)
+
+
+def enabled():
+    return PARALLEL_QUERIES['ENABLED'] and not connection.in_atomic_block
+
+
+def gather(*calls):
+    """Вызывает функции без аргументов calls и возвращает их результаты
+    в том же порядке. Исключение первого упавшего вызова пробрасывается
+    после завершения остальных.
+    """
+    if not enabled() or len(calls) < 2:
+        return [call() for call in calls]
+    futures = [executor.submit(call_in_thread, call) for call in calls]
+    errors = [future.exception() for future in futures]
+    for error in errors:
+        if error is not None:
+            raise error
+    return [future.result() for future in futures]
@@ -0,0 +1,42 @@
+import time
+
+from django.core.cache import cache
+
+
+class TokenBucket:
+    """Ограничение частоты действий пользователя «ведром токенов».
+
+    Состояние ведра (остаток токенов и время последнего обращения)
+    хранится в общем кэше, поэтому лимит действует во всех процессах.
+    Чтение и запись состояния не атомарны: при одновременных запросах
+    лимит может быть превышен на единицы, что для защиты от спама
+    допустимо.
+    """
+
+    def __init__(self, scope, capacity, refill_rate):
+        self.scope = scope
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+
+    def cache_key(self, ident):
+        return f'ratelimit:{self.scope}:{ident}'
+
+    def consume(self, ident, tokens=1):
+        """Списывает токены; возвращает False, если лимит исчерпан."""
+        key = self.cache_key(ident)
+        now = time.time()
+        available, updated = cache.get(key, (self.capacity, now))
+        available = min(
+            self.capacity, available + (now - updated) * self.refill_rate
+        )
+        allowed = available >= tokens
+        if allowed:
+            available -= tokens
+        # Ведро заполняется полностью за capacity / refill_rate секунд,
+        # дольше хранить состояние незачем.
+        cache.set(
+            key,
+            (available, now),
+            int(self.capacity / self.refill_rate) + 1
+        )
+        return allowed
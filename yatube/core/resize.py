@@ -0,0 +1,173 @@
+"""Картинки нужного размера по подписанным ссылкам.
+
+Ссылка вида resize/<подпись>/<вариант>/<путь в MEDIA_ROOT>, вариант —
+'960x339-center.jpeg': размер, способ обрезки и формат. Подпись не
+даёт заказать произвольный вариант, а размеры, обрезки и форматы
+дополнительно ограничены списками IMAGE_RESIZE. Вариант создаётся при
+первом запросе в пуле из IMAGE_RESIZE['WORKERS'] потоков и хранится
+на диске в IMAGE_RESIZE['CACHE_DIR'] с разбиением по подкаталогам, как
+кэш sorl-thumbnail. Одновременные запросы одного варианта ждут общую
+задачу, а не создают картинку каждый сам.
+"""
+import hashlib
+import math
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core import signing
+from django.urls import reverse
+from django.utils._os import safe_join
+from django.utils.crypto import constant_time_compare
+from PIL import Image, ImageOps
+
+from yatube.settings import IMAGE_RESIZE, MEDIA_ROOT
+
+SPEC_RE = re.compile(r'^(\d+)x(\d+)(?:-([a-z]+))?\.([a-z]+)$')
+CROPS = {
+    'center': (0.5, 0.5),
+    'top': (0.5, 0.0),
+    'bottom': (0.5, 1.0),
+}
+FORMATS = {
+    'jpeg': 'JPEG',
+    'png': 'PNG',
+    'webp': 'WEBP',
+}
+
+signer = signing.Signer(salt='core.resize')
+executor = ThreadPoolExecutor(
+    IMAGE_RESIZE['WORKERS'], thread_name_prefix='resize'
+)
+pending = {}
+pending_lock = threading.RLock()
+
+
+def make_spec(size, crop=None, format='jpeg'):
+    if crop:
+        return f'{size}-{crop}.{format}'
+    return f'{size}.{format}'
+
+
+def parse_spec(spec):
+    """Тройка (размер, обрезка, формат) варианта из списков
+    IMAGE_RESIZE; ValueError для остальных.
+    """
+    match = SPEC_RE.match(spec)
+    if match is None:
+        raise ValueError(f'Неверный вариант картинки {spec}')
+    width, height, crop, format = match.groups()
+    size = f'{width}x{height}'
+    if (
+        size not in IMAGE_RESIZE['SIZES']
+        or (crop is not None and crop not in IMAGE_RESIZE['CROPS'])
+        or format not in IMAGE_RESIZE['FORMATS']
+    ):
+        raise ValueError(f'Вариант картинки {spec} не разрешён')
+    return (int(width), int(height)), crop, format
+
+
+def signature(spec, path):
+    return signer.signature(f'{spec}/{path}')
+
+
+def valid_signature(value, spec, path):
+    return constant_time_compare(value, signature(spec, path))
+
+
+def resized_url(path, size, crop=None, format='jpeg'):
+    """Подписанная ссылка на вариант картинки path."""
+    spec = make_spec(size, crop, format)
+    parse_spec(spec)
+    return reverse('resize', args=[signature(spec, path), spec, path])
+
+
+def cache_name(spec, path):
+    key = hashlib.sha1(f'{spec}/{path}'.encode()).hexdigest()
+    extension = spec.rsplit('.', 1)[1]
+    return os.path.join(
+        IMAGE_RESIZE['CACHE_DIR'], key[:2], key[2:4], f'{key}.{extension}'
+    )
+
+
+def variant_size(width, height, size, crop=None):
+    """Размеры варианта картинки width x height, которые получит render,
+    вычисленные без чтения файла.
+    """
+    if crop is not None:
+        return size
+    # Повторяет расчёт Image.thumbnail: из округлений вниз и вверх
+    # выбирается то, что точнее сохраняет пропорции.
+    box_width, box_height = map(math.floor, size)
+    if box_width >= width and box_height >= height:
+        return width, height
+    aspect = width / height
+    if box_width / box_height >= aspect:
+        return round_aspect(
+            box_height * aspect, lambda n: abs(aspect - n / box_height)
+        ), box_height
+    return box_width, round_aspect(
+        box_width / aspect,
+        lambda n: 0 if n == 0 else abs(aspect - box_width / n)
+    )
+
+
+def round_aspect(number, key):
+    return max(min(math.floor(number), math.ceil(number), key=key), 1)
+
+
+def render(source, target, size, crop, format):
+    """Создаёт вариант картинки; файл появляется целиком через
+    os.replace, поэтому недописанный вариант никто не прочитает.
+    """
+    if os.path.exists(target):
+        return
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if crop is not None:
+            image = ImageOps.fit(
+                image, size, Image.LANCZOS, centering=CROPS[crop]
+            )
+        else:
+            image.thumbnail(size, Image.LANCZOS)
+        if format == 'jpeg' and image.mode != 'RGB':
+            image = image.convert('RGB')
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temporary = f'{target}.{os.getpid()}-{threading.get_ident()}.tmp'
+        try:
+            image.save(
+                temporary, FORMATS[format], quality=IMAGE_RESIZE['QUALITY']
+            )
+            os.replace(temporary, target)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+
+def forget(target):
+    with pending_lock:
+        pending.pop(target, None)
+
+
+def resized_file(path, spec):
+    """Путь к файлу варианта spec картинки path, созданному при
+    необходимости. FileNotFoundError, если картинки нет.
+    """
+    size, crop, format = parse_spec(spec)
+    source = safe_join(MEDIA_ROOT, path)
+    target = safe_join(MEDIA_ROOT, cache_name(spec, path))
+    if os.path.exists(target):
+        return target
+    if not os.path.isfile(source):
+        raise FileNotFoundError(source)
+    with pending_lock:
+        future = pending.get(target)
+        if future is None:
+            future = executor.submit(
+                render, source, target, size, crop, format
+            )
+            pending[target] = future
+            future.add_done_callback(lambda done: forget(target))
+    future.result(IMAGE_RESIZE['TIMEOUT'])
+    return target
@@ -0,0 +1,159 @@
+"""Объединение одинаковых одновременных запросов (single flight).
+
+Первый анонимный GET-запрос к адресу становится ведущим и выполняет
+представление, а такие же запросы, пришедшие, пока он не закончил,
+ждут и получают копию его ответа. При SINGLE_FLIGHT['SHARED'] ведущий
+дополнительно занимает блокировку в общем кэше и кладёт туда ответ на
+RESULT_TTL секунд, чтобы ответ достался и ведомым других процессов.
+
+Счётчики ведущих запросов (computed) и получивших чужой ответ внутри
+процесса (coalesced) и из общего кэша (shared) хранятся в кэше, их
+возвращает metrics().
+"""
+import hashlib
+import threading
+import time
+import uuid
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from yatube.settings import SINGLE_FLIGHT
+
+from .page_cache import anonymous_request
+
+METRICS = ('computed', 'coalesced', 'shared')
+
+
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.page = None
+
+
+flights = {}
+flights_lock = threading.Lock()
+
+
+def record(name):
+    key = f'single_flight:{name}'
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def metrics():
+    values = cache.get_many([f'single_flight:{name}' for name in METRICS])
+    return {
+        name: values.get(f'single_flight:{name}', 0) for name in METRICS
+    }
+
+
+def flight_key(request):
+    # Страница для кэша страниц содержит метки вместо фрагментов,
+    # поэтому её нельзя отдать запросу, который кэш обходит.
+    for_page_cache = getattr(request, 'page_cache', None) is not None
+    value = ':'.join([
+        request.method, str(for_page_cache), request.build_absolute_uri()
+    ])
+    return hashlib.sha1(value.encode()).hexdigest()
+
+
+def freeze(response):
+    """Ответ в виде словаря для передачи ведомым; None, если ответ
+    нельзя разделить.
+    """
+    if response.streaming or response.cookies:
+        return None
+    return {
+        'content': response.content,
+        'status': response.status_code,
+        'headers': list(response.items()),
+    }
+
+
+def thaw(page):
+    response = HttpResponse(page['content'], status=page['status'])
+    for name, value in page['headers']:
+        response[name] = value
+    return response
+
+
+def wait_shared(key):
+    deadline = time.monotonic() + SINGLE_FLIGHT['SHARED_WAIT']
+    while time.monotonic() < deadline:
+        time.sleep(SINGLE_FLIGHT['POLL_INTERVAL'])
+        page = cache.get(f'single_flight:result:{key}')
+        if page is not None:
+            return page
+    return None
+
+
+def lead(key, view, request, args, kwargs):
+    """Выполняет представление за всех ведомых процесса."""
+    if not SINGLE_FLIGHT['SHARED']:
+        record('computed')
+        return view(request, *args, **kwargs)
+    lock = f'single_flight:lock:{key}'
+    token = uuid.uuid4().hex
+    if not cache.add(lock, token, SINGLE_FLIGHT['LOCK_TIMEOUT']):
+        page = wait_shared(key)
+        if page is not None:
+            record('shared')
+            return thaw(page)
+    record('computed')
+    try:
+        response = view(request, *args, **kwargs)
+        page = freeze(response)
+        if page is not None:
+            cache.set(
+                f'single_flight:result:{key}',
+                page,
+                SINGLE_FLIGHT['RESULT_TTL'],
+            )
+        return response
+    finally:
+        if cache.get(lock) == token:
+            cache.delete(lock)
+
+
+def coalesce(view, request, args, kwargs):
+    key = flight_key(request)
+    with flights_lock:
+        flight = flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = flights[key] = Flight()
+    if not leader:
+        if flight.done.wait(SINGLE_FLIGHT['WAIT']) and flight.page:
+            record('coalesced')
+            return thaw(flight.page)
+        # Ведущий упал, не уложился в WAIT или ответ нельзя разделить.
+        return view(request, *args, **kwargs)
+    try:
+        response = lead(key, view, request, args, kwargs)
+        flight.page = freeze(response)
+        return response
+    finally:
+        with flights_lock:
+            flights.pop(key, None)
+        flight.done.set()
+
+
+def single_flight(view):
+    """Объединяет одинаковые одновременные анонимные GET-запросы
+    к представлению view.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (
+            not SINGLE_FLIGHT['ENABLED']
+            or request.method not in ('GET', 'HEAD')
+            or not anonymous_request(request)
+        ):
+            return view(request, *args, **kwargs)
+        return coalesce(view, request, args, kwargs)
+    return wrapper
@@ -0,0 +1,60 @@
+"""Хранилище статики с хешами в именах и сжатыми копиями файлов.
+
+collectstatic добавляет к именам файлов хеш содержимого и кладёт рядом
+с текстовыми файлами копии .gz и, если установлен пакет brotli, .br.
+Сжатые копии отдаёт core.middleware.StaticFilesMiddleware.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.ico', '.txt', '.json', '.xml')
+
+
+def compress(content):
+    """Сжатые варианты content: расширение -> байты."""
+    variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content)
+    return {
+        extension: data
+        for extension, data in variants.items()
+        if len(data) < len(content)
+    }
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed = []
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if hashed_name:
+                hashed.append(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in hashed:
+            if not name.endswith(COMPRESSIBLE):
+                continue
+            with self.open(name) as original:
+                content = original.read()
+            for extension, data in compress(content).items():
+                if self.exists(name + extension):
+                    self.delete(name + extension)
+                self._save(name + extension, ContentFile(data))
+
+    def stored_name(self, name):
+        # Без collectstatic (в разработке и тестах) файлы отдаются под
+        # исходными именами.
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
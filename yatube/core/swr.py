@@ -0,0 +1,85 @@
+"""Кэш с отдачей устаревшего значения на время пересчёта
+(stale-while-revalidate).
+
+Значение хранится вместе со сроком свежести ttl и временем, которое
+ушло на его вычисление, а живёт в кэше ещё SWR_CACHE['STALE_TTL']
+секунд после истечения свежести. Пересчитывает значение тот процесс,
+который первым займёт блокировку (cache.add работает атомарно для всех
+процессов с общим кэшем); остальные в это время получают устаревшее
+значение. Чтобы популярные ключи не истекали у всех одновременно,
+пересчёт начинается раньше срока с вероятностью, растущей к его концу
+и ко времени вычисления (алгоритм XFetch).
+"""
+import math
+import random
+import time
+import uuid
+
+from django.core.cache import cache
+
+from yatube.settings import SWR_CACHE
+
+
+def lock_key(key):
+    return f'swr_lock:{key}'
+
+
+def acquire(key):
+    """Токен блокировки пересчёта key или None, если её держит другой
+    процесс.
+    """
+    token = uuid.uuid4().hex
+    if cache.add(lock_key(key), token, SWR_CACHE['LOCK_TIMEOUT']):
+        return token
+    return None
+
+
+def release(key, token):
+    if cache.get(lock_key(key)) == token:
+        cache.delete(lock_key(key))
+
+
+def is_fresh(entry, now, beta):
+    """Свежо ли значение с учётом вероятностного раннего истечения."""
+    # -log(random) > 0, поэтому срок сдвигается только в прошлое.
+    early = entry['delta'] * beta * -math.log(1 - random.random())
+    return now + early < entry['expires']
+
+
+def store(key, compute, ttl):
+    started = time.monotonic()
+    value = compute()
+    cache.set(key, {
+        'value': value,
+        'expires': time.time() + ttl,
+        'delta': time.monotonic() - started,
+    }, ttl + SWR_CACHE['STALE_TTL'])
+    return value
+
+
+def get_or_compute(key, compute, ttl, beta=None):
+    """Значение key из кэша или результат compute(), сохранённый
+    как свежий на ttl секунд.
+    """
+    if beta is None:
+        beta = SWR_CACHE['BETA']
+    entry = cache.get(key)
+    if entry is not None and is_fresh(entry, time.time(), beta):
+        return entry['value']
+    token = acquire(key)
+    if token is None:
+        if entry is not None:
+            return entry['value']
+        # Значения ещё нет: ждём, пока его вычислит владелец блокировки,
+        # а если не дождались — вычисляем сами.
+        deadline = time.monotonic() + SWR_CACHE['LOCK_WAIT']
+        while time.monotonic() < deadline:
+            time.sleep(SWR_CACHE['POLL_INTERVAL'])
+            entry = cache.get(key)
+            if entry is not None:
+                return entry['value']
+        return compute()
+    try:
+        return store(key, compute, ttl)
+    finally:
+        release(key, token)
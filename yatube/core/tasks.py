@@ -0,0 +1,178 @@
+"""Очередь фоновых задач с брокером в таблице Task.
+
+Обработчики запросов только ставят задачу в очередь функцией enqueue,
+а выполняют их процессы команды run_workers. Задача захватывается
+условным UPDATE по состоянию, поэтому один и тот же Task не выполнят
+два процесса сразу. Упавшая задача повторяется с экспоненциальной
+задержкой, пока не исчерпает max_attempts.
+"""
+import datetime as dt
+import json
+import logging
+import random
+import traceback
+
+from django.db import IntegrityError, transaction
+from django.db.models import (Avg, Count, DurationField, ExpressionWrapper,
+                              F, Q)
+from django.utils import timezone
+
+from yatube.settings import TASKS
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(name, priority=Task.DEFAULT, max_attempts=None):
+    """Регистрирует функцию как фоновую задачу с именем name."""
+    def decorator(func):
+        func.task_name = name
+        func.priority = priority
+        func.max_attempts = max_attempts or TASKS['MAX_ATTEMPTS']
+        registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(func, *args, idempotency_key=None, priority=None, delay=0,
+            unique=False, **kwargs):
+    """Ставит задачу в очередь и возвращает её Task.
+
+    Повторный вызов с тем же idempotency_key возвращает уже созданную
+    задачу. При unique=True возвращается ещё не начатая задача с теми же
+    аргументами, если она есть. При TASKS['ALWAYS_EAGER'] задача
+    выполняется сразу.
+    """
+    payload = json.dumps({'args': args, 'kwargs': kwargs})
+    if unique:
+        existing = Task.objects.filter(
+            name=func.task_name, payload=payload, status=Task.QUEUED
+        ).first()
+        if existing is not None:
+            return existing
+    if idempotency_key is not None:
+        existing = Task.objects.filter(idempotency_key=idempotency_key)
+        existing = existing.first()
+        if existing is not None:
+            return existing
+    item = Task(
+        name=func.task_name,
+        payload=payload,
+        priority=func.priority if priority is None else priority,
+        max_attempts=func.max_attempts,
+        idempotency_key=idempotency_key,
+        run_at=timezone.now() + dt.timedelta(seconds=delay),
+    )
+    try:
+        with transaction.atomic():
+            item.save()
+    except IntegrityError:
+        return Task.objects.get(idempotency_key=idempotency_key)
+    if TASKS['ALWAYS_EAGER']:
+        claim(item.pk)
+        execute(item)
+    return item
+
+
+def claim(pk):
+    """Захватывает задачу; False, если её уже взял другой процесс."""
+    now = timezone.now()
+    return bool(Task.objects.filter(
+        Q(status=Task.QUEUED)
+        | Q(status=Task.RUNNING, locked_until__lt=now),
+        pk=pk,
+    ).update(
+        status=Task.RUNNING,
+        started=now,
+        locked_until=now + dt.timedelta(seconds=TASKS['LOCK_TIMEOUT']),
+        attempts=F('attempts') + 1,
+    ))
+
+
+def next_tasks(priorities=None, limit=None):
+    """Готовые к запуску задачи в порядке приоритета."""
+    now = timezone.now()
+    tasks = Task.objects.filter(
+        Q(status=Task.QUEUED, run_at__lte=now)
+        # Задачи упавших воркеров возвращаются после LOCK_TIMEOUT.
+        | Q(status=Task.RUNNING, locked_until__lt=now)
+    )
+    if priorities is not None:
+        tasks = tasks.filter(priority__in=priorities)
+    return list(tasks.order_by('priority', 'run_at')[
+        :limit or TASKS['BATCH_SIZE']
+    ])
+
+
+def backoff(attempts):
+    """Задержка перед повтором: base * 2^(n-1) со случайным разбросом."""
+    delay = TASKS['BACKOFF'] * 2 ** (attempts - 1)
+    return delay * random.uniform(0.5, 1.5)
+
+
+def execute(item):
+    """Выполняет захваченную задачу и сохраняет результат."""
+    item.refresh_from_db()
+    func = registry.get(item.name)
+    try:
+        if func is None:
+            raise LookupError(f'Задача {item.name} не зарегистрирована')
+        payload = json.loads(item.payload)
+        func(*payload['args'], **payload['kwargs'])
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Task %s #%s failed', item.name, item.pk)
+        if item.attempts >= item.max_attempts:
+            Task.objects.filter(pk=item.pk).update(
+                status=Task.FAILED,
+                last_error=error,
+                finished=timezone.now(),
+                locked_until=None,
+            )
+        else:
+            Task.objects.filter(pk=item.pk).update(
+                status=Task.QUEUED,
+                last_error=error,
+                locked_until=None,
+                run_at=timezone.now() + dt.timedelta(
+                    seconds=backoff(item.attempts)
+                ),
+            )
+        return False
+    Task.objects.filter(pk=item.pk).update(
+        status=Task.DONE,
+        finished=timezone.now(),
+        locked_until=None,
+    )
+    return True
+
+
+def run_pending(priorities=None, limit=None):
+    """Выполняет готовые задачи; возвращает число выполненных."""
+    done = 0
+    for item in next_tasks(priorities, limit):
+        if claim(item.pk):
+            execute(item)
+            done += 1
+    return done
+
+
+def metrics():
+    """Число задач по имени и состоянию и среднее время выполнения."""
+    rows = Task.objects.order_by().values('name', 'status').annotate(
+        total=Count('pk')
+    )
+    result = {}
+    for row in rows:
+        result.setdefault(row['name'], {})[row['status']] = row['total']
+    durations = Task.objects.filter(status=Task.DONE).order_by().values(
+        'name'
+    ).annotate(duration=Avg(ExpressionWrapper(
+        F('finished') - F('started'), output_field=DurationField()
+    )))
+    for row in durations:
+        result[row['name']]['avg_duration'] = row['duration']
+    return result
@@ -0,0 +1,12 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core import page_cache
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, name, *args):
+    """Фрагмент страницы, который не попадает в кэш страниц."""
+    return mark_safe(page_cache.hole(context['request'], name, *args))
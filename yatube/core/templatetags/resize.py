@@ -0,0 +1,22 @@
+from django import template
+
+from core.resize import resized_url, variant_size
+
+register = template.Library()
+
+
+@register.simple_tag
+def resized(image, size, crop=None, format='jpeg'):
+    """Подписанная ссылка на вариант картинки нужного размера."""
+    if not image:
+        return ''
+    return resized_url(image.name, size, crop, format)
+
+
+@register.simple_tag
+def resized_size(width, height, size, crop=None):
+    """Пара (ширина, высота) варианта size картинки с сохранёнными
+    размерами width x height; файл картинки не читается.
+    """
+    box = tuple(int(value) for value in size.split('x'))
+    return variant_size(width, height, box, crop)
@@ -1,4 +1,60 @@
-from django.test import TestCase
+import gzip
+import importlib
+import io
+import os
+import shutil
+import socketserver
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.text import MIMEText
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.mail import EmailMessage
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.db import connection
+from django.http import Http404, HttpResponse
+from django.template import Context, Template
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from core.asgi import call_in_thread
+from core.mail import QueuedEmailBackend, dump_message, load_message
+from core.models import OutgoingEmail, Task
+from core import page_cache, resize, single_flight
+from core.cache import TwoTierCache, tiers
+from core.parallel import gather
+from core.resize import (resized_file, resized_url, signature,
+                         variant_size)
+from core.swr import acquire, get_or_compute
+from core.tasks import claim, enqueue, metrics, run_pending, task
+from posts.models import Post
+from yatube.settings import (IMAGE_RESIZE, MAIL_QUEUE, MEDIA_SERVE,
+                             PARALLEL_QUERIES, SINGLE_FLIGHT)
+
+User = get_user_model()
+calls = []
+
+
+@task('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task('tests.fail', max_attempts=2)
+def fail():
+    raise ValueError('fail')
+
+
+def not_found():
+    raise Http404
 
 
 class ViewTestClass(TestCase):
@@ -6,3 +62,765 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, 404)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_idempotency_key(self):
+        """Задача с тем же ключом не ставится в очередь повторно."""
+        first = enqueue(record, 1, idempotency_key='key')
+        second = enqueue(record, 2, idempotency_key='key')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, [1])
+
+    def test_unique_task_not_duplicated(self):
+        """Ожидающая задача с теми же аргументами не дублируется."""
+        first = enqueue(record, 1, unique=True)
+        self.assertEqual(enqueue(record, 1, unique=True).pk, first.pk)
+        self.assertNotEqual(enqueue(record, 2, unique=True).pk, first.pk)
+        run_pending()
+        self.assertNotEqual(enqueue(record, 1, unique=True).pk, first.pk)
+
+    def test_priority_order(self):
+        """Задачи с высоким приоритетом выполняются первыми."""
+        enqueue(record, 'low', priority=Task.LOW)
+        enqueue(record, 'high', priority=Task.HIGH)
+        enqueue(record, 'default')
+        run_pending()
+        self.assertEqual(calls, ['high', 'default', 'low'])
+
+    def test_task_claimed_once(self):
+        """Захваченную задачу не может взять другой воркер."""
+        item = enqueue(record, 1)
+        self.assertTrue(claim(item.pk))
+        self.assertFalse(claim(item.pk))
+
+    def test_failed_task_retried_with_backoff(self):
+        """Упавшая задача откладывается, а после max_attempts — FAILED."""
+        item = enqueue(fail)
+        run_pending()
+        item.refresh_from_db()
+        self.assertEqual(item.status, Task.QUEUED)
+        self.assertGreater(item.run_at, timezone.now())
+        self.assertEqual(run_pending(), 0)
+        Task.objects.filter(pk=item.pk).update(run_at=timezone.now())
+        run_pending()
+        item.refresh_from_db()
+        self.assertEqual(item.status, Task.FAILED)
+        self.assertIn('ValueError', item.last_error)
+        self.assertEqual(metrics()['tests.fail'], {Task.FAILED: 1})
+
+    def test_metrics_duration(self):
+        """Для выполненных задач считается среднее время."""
+        enqueue(record, 1)
+        run_pending()
+        stats = metrics()['tests.record']
+        self.assertEqual(stats[Task.DONE], 1)
+        self.assertIsNotNone(stats['avg_duration'])
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Минимальный SMTP-сервер: принимает письма всем, кроме адресов
+    со словом refused.
+    """
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 localhost')
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line[:4].upper()
+            if not line or command == 'QUIT':
+                self.reply('221 bye')
+                return
+            if command == 'RCPT' and 'refused' in line:
+                self.reply('550 no such user')
+                continue
+            if command == 'DATA':
+                self.reply('354 go ahead')
+                while self.rfile.readline().rstrip(b'\r\n') != b'.':
+                    pass
+                self.server.messages += 1
+            self.reply('250 ok')
+
+
+class MailQueueTests(TestCase):
+    def setUp(self):
+        self.server = socketserver.ThreadingTCPServer(
+            ('127.0.0.1', 0), SMTPHandler
+        )
+        self.server.connections = 0
+        self.server.messages = 0
+        threading.Thread(target=self.server.serve_forever).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_messages_sent_by_worker_over_one_connection(self):
+        """Письма ставятся в очередь и уходят по одному соединению."""
+        messages = [
+            EmailMessage(f'subject {i}', 'body', to=['user@example.com'])
+            for i in range(3)
+        ]
+        self.assertEqual(QueuedEmailBackend().send_messages(messages), 3)
+        self.assertEqual(self.server.messages, 0)
+        self.assertEqual(
+            Task.objects.filter(name='core.deliver_mail').count(), 1
+        )
+        smtp = 'django.core.mail.backends.smtp.EmailBackend'
+        with mock.patch.dict(MAIL_QUEUE, {'BACKEND': smtp}):
+            with override_settings(
+                EMAIL_HOST='127.0.0.1',
+                EMAIL_PORT=self.server.server_address[1],
+            ):
+                run_pending()
+        self.assertEqual(self.server.messages, 3)
+        self.assertEqual(self.server.connections, 1)
+        self.assertFalse(OutgoingEmail.objects.exclude(
+            status=OutgoingEmail.SENT
+        ).exists())
+
+    def test_attachments_survive_queue(self):
+        """Вложения сохраняются вместе с письмом."""
+        message = EmailMessage('subject', 'body', to=['user@example.com'])
+        message.attach('report.txt', 'текст', 'text/plain')
+        message.attach('image.gif', b'GIF89a\x00\xff', 'image/gif')
+        loaded = load_message(dump_message(message))
+        self.assertEqual(loaded.attachments, [
+            ('report.txt', 'текст', 'text/plain'),
+            ('image.gif', b'GIF89a\x00\xff', 'image/gif'),
+        ])
+        message.attach(MIMEText('text'))
+        with self.assertRaises(ValueError):
+            QueuedEmailBackend().send_messages([message])
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+    def test_failing_message_does_not_block_queue(self):
+        """Письмо, которое не уходит, откладывается, а затем помечается
+        ошибочным, не задерживая остальные.
+        """
+        QueuedEmailBackend().send_messages([
+            EmailMessage('bad', 'body', to=['refused@example.com']),
+            EmailMessage('good', 'body', to=['user@example.com']),
+        ])
+        smtp = 'django.core.mail.backends.smtp.EmailBackend'
+        with mock.patch.dict(MAIL_QUEUE, {'BACKEND': smtp}):
+            with override_settings(
+                EMAIL_HOST='127.0.0.1',
+                EMAIL_PORT=self.server.server_address[1],
+            ):
+                run_pending()
+                self.assertEqual(self.server.messages, 1)
+                bad = OutgoingEmail.objects.get(subject='bad')
+                self.assertEqual(bad.status, OutgoingEmail.QUEUED)
+                self.assertEqual(bad.attempts, 1)
+                self.assertIn('no such user', bad.last_error)
+                self.assertTrue(Task.objects.filter(
+                    name='core.deliver_mail', status=Task.QUEUED
+                ).exists())
+                for _ in range(MAIL_QUEUE['MAX_ATTEMPTS'] - 1):
+                    OutgoingEmail.objects.update(run_at=timezone.now())
+                    Task.objects.update(run_at=timezone.now())
+                    run_pending()
+        bad.refresh_from_db()
+        self.assertEqual(bad.status, OutgoingEmail.FAILED)
+        self.assertEqual(bad.attempts, MAIL_QUEUE['MAX_ATTEMPTS'])
+        self.assertEqual(
+            OutgoingEmail.objects.get(subject='good').status,
+            OutgoingEmail.SENT
+        )
+
+
+class ParallelQueriesTests(TransactionTestCase):
+    def test_calls_run_concurrently(self):
+        """Независимые вызовы выполняются одновременно."""
+        def slow(value):
+            time.sleep(0.2)
+            return value
+
+        started = time.perf_counter()
+        with mock.patch.dict(PARALLEL_QUERIES, {'ENABLED': True}):
+            result = gather(
+                lambda: slow(1), lambda: slow(2), lambda: slow(3)
+            )
+        self.assertEqual(result, [1, 2, 3])
+        self.assertLess(time.perf_counter() - started, 0.5)
+
+    def test_pool_threads_keep_connections(self):
+        """Поток пула не открывает новое соединение на каждый вызов."""
+        def current_connection():
+            connection.ensure_connection()
+            return connection.connection
+
+        pool = ThreadPoolExecutor(1)
+        try:
+            first, second = (
+                pool.submit(call_in_thread, current_connection).result()
+                for _ in range(2)
+            )
+            self.assertIs(first, second)
+            pool.submit(lambda: connection.close()).result()
+        finally:
+            pool.shutdown()
+
+    def test_queries_use_own_connections(self):
+        """Запросы в потоках видят зафиксированные данные, а ошибка
+        вызова пробрасывается.
+        """
+        User.objects.create_user(username='TestUser')
+        with mock.patch.dict(PARALLEL_QUERIES, {'ENABLED': True}):
+            self.assertEqual(gather(
+                lambda: User.objects.count(),
+                lambda: User.objects.get().username,
+            ), [1, 'TestUser'])
+            with self.assertRaises(Http404):
+                gather(lambda: 1, not_found)
+
+
+class StaticFilesTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.static_root = tempfile.mkdtemp()
+        cls.settings = override_settings(STATIC_ROOT=cls.static_root)
+        cls.settings.enable()
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.url = staticfiles_storage.url('css/bootstrap.min.css')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.settings.disable()
+        shutil.rmtree(cls.static_root, ignore_errors=True)
+
+    def test_hashed_file_served_compressed(self):
+        """Файл с хешем отдаётся сжатым и кэшируется навсегда."""
+        self.assertNotEqual(self.url, '/static/css/bootstrap.min.css')
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        content = b''.join(response.streaming_content)
+        response.close()
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn(b'bootstrap', gzip.decompress(content))
+
+    def test_not_modified(self):
+        """Совпавший ETag даёт ответ 304, а у сжатой копии ETag свой."""
+        response = self.client.get(self.url)
+        response.close()
+        etag = response['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag
+        )
+        response.close()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], etag[:-1] + '-gzip"')
+
+    def test_accept_encoding_quality(self):
+        """Кодировки с q=0 не выбираются, а из остальных берётся
+        с наибольшим q.
+        """
+        for header, encoding in (
+            ('gzip;q=0', None),
+            ('gzip;q=0, identity', None),
+            ('br;q=0.5, gzip', 'gzip'),
+            ('br;q=0, *', 'gzip'),
+            ('*;q=0', None),
+        ):
+            with self.subTest(header=header):
+                response = self.client.get(
+                    self.url, HTTP_ACCEPT_ENCODING=header
+                )
+                response.close()
+                self.assertEqual(response.get('Content-Encoding'), encoding)
+
+
+class MediaTests(SimpleTestCase):
+    content = bytes(range(256)) * 4
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        os.mkdir(os.path.join(self.media_root, 'posts'))
+        with open(os.path.join(self.media_root, 'posts/file.bin'), 'wb') as f:
+            f.write(self.content)
+        patcher = mock.patch('core.views.MEDIA_ROOT', self.media_root)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, path='/media/posts/file.bin', **headers):
+        response = self.client.get(path, **headers)
+        if response.streaming:
+            response.content_bytes = b''.join(response.streaming_content)
+            response.close()
+        return response
+
+    def test_full_file(self):
+        """Файл отдаётся целиком с валидаторами кэша."""
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content_bytes, self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+    def test_ranges(self):
+        """Запрос диапазона возвращает часть файла."""
+        cases = (
+            ('bytes=2-5', 2, 5),
+            ('bytes=1020-', 1020, 1023),
+            ('bytes=-4', 1020, 1023),
+            ('bytes=1000-5000', 1000, 1023),
+        )
+        for header, start, end in cases:
+            with self.subTest(header=header):
+                response = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(
+                    response.content_bytes, self.content[start:end + 1]
+                )
+                self.assertEqual(
+                    response['Content-Range'], f'bytes {start}-{end}/1024'
+                )
+
+    def test_unsatisfiable_range(self):
+        response = self.get(HTTP_RANGE='bytes=2000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+    def test_if_range_and_conditional_requests(self):
+        """Устаревший If-Range даёт весь файл, совпавший ETag — 304."""
+        etag = self.get()['ETag']
+        response = self.get(HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, 200)
+        response = self.get(HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_if_none_match_lists(self):
+        """If-None-Match со списком тегов, слабым тегом и '*'."""
+        etag = self.get()['ETag']
+        for header in (f'"old", {etag}', f'W/{etag}', '*'):
+            self.assertEqual(
+                self.get(HTTP_IF_NONE_MATCH=header).status_code, 304, header
+            )
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"old"').status_code, 200)
+
+    def test_path_outside_media_root(self):
+        self.assertEqual(self.get('/media/../settings.py').status_code, 404)
+        self.assertEqual(self.get('/media/posts/').status_code, 404)
+
+    def test_route_follows_media_url(self):
+        """Маршрут к файлам строится из MEDIA_URL."""
+        with override_settings(MEDIA_URL='/uploads/'):
+            urls = importlib.reload(importlib.import_module('yatube.urls'))
+            self.addCleanup(importlib.reload, urls)
+            self.assertEqual(
+                reverse('media', args=['posts/file.bin'], urlconf=urls),
+                '/uploads/posts/file.bin',
+            )
+
+    def test_accel_redirect(self):
+        """Прокси получает внутренний путь к файлу и отдаёт его сам."""
+        with mock.patch.dict(MEDIA_SERVE, {'ACCEL': 'x-accel-redirect'}):
+            response = self.get()
+        self.assertEqual(response.content, b'')
+        self.assertEqual(self.proxy(response), self.content)
+
+    def proxy(self, response):
+        """Заглушка nginx: отдаёт файл из internal-location
+        ACCEL_PREFIX, который указывает на MEDIA_ROOT.
+        """
+        location = response['X-Accel-Redirect']
+        self.assertTrue(location.startswith(MEDIA_SERVE['ACCEL_PREFIX']))
+        path = location[len(MEDIA_SERVE['ACCEL_PREFIX']):]
+        with open(os.path.join(self.media_root, path), 'rb') as file:
+            return file.read()
+
+
+class ResizeTests(SimpleTestCase):
+    path = 'posts/photo.png'
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        os.mkdir(os.path.join(self.media_root, 'posts'))
+        Image.new('RGB', (100, 50), 'red').save(
+            os.path.join(self.media_root, self.path)
+        )
+        for target in ('core.views.MEDIA_ROOT', 'core.resize.MEDIA_ROOT'):
+            patcher = mock.patch(target, self.media_root)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_variant_created_and_cached(self):
+        """Вариант создаётся при первом запросе и сохраняется на диске."""
+        url = resized_url(self.path, '320x320', 'center')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        content = b''.join(response.streaming_content)
+        response.close()
+        with Image.open(io.BytesIO(content)) as image:
+            self.assertEqual(image.size, (320, 320))
+        target = resized_file(self.path, '320x320-center.jpeg')
+        self.assertTrue(target.startswith(
+            os.path.join(self.media_root, 'resized') + os.sep
+        ))
+        with mock.patch('core.resize.render') as render:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        render.assert_not_called()
+
+    def test_variant_size_without_reading_file(self):
+        """Размеры варианта известны заранее по размерам картинки."""
+        target = resized_file(self.path, '480x170.png')
+        with Image.open(target) as image:
+            self.assertEqual(
+                image.size, variant_size(100, 50, (480, 170))
+            )
+        self.assertEqual(variant_size(100, 50, (320, 320)), (100, 50))
+        self.assertEqual(
+            variant_size(100, 50, (320, 320), 'center'), (320, 320)
+        )
+
+    def test_variant_size_matches_thumbnail(self):
+        """Расчёт размеров совпадает с Image.thumbnail."""
+        self.assertEqual(variant_size(104, 1024, (960, 960)), (97, 960))
+        for width in range(1, 200, 7):
+            for height in range(1, 1200, 37):
+                for size in ((960, 960), (480, 170), (100, 100)):
+                    image = Image.new('L', (width, height))
+                    image.thumbnail(size)
+                    self.assertEqual(
+                        variant_size(width, height, size), image.size,
+                        (width, height, size)
+                    )
+
+    def test_slow_and_oversized_images(self):
+        """Не успевший создаться вариант — 503, картинка-бомба — 404."""
+        url = resized_url(self.path, '480x170')
+        rendered = threading.Event()
+        with mock.patch(
+            'core.resize.render', side_effect=lambda *args: rendered.wait()
+        ), mock.patch.dict(IMAGE_RESIZE, {'TIMEOUT': 0.01}):
+            response = self.client.get(url)
+            slow = list(resize.pending.values())
+            rendered.set()
+            for future in slow:
+                future.result()
+        self.assertEqual(response.status_code, 503)
+        with mock.patch(
+            'core.resize.render', side_effect=Image.DecompressionBombError
+        ):
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_only_signed_allowed_variants(self):
+        """Неподписанные и не разрешённые варианты не создаются."""
+        url = resized_url(self.path, '480x170')
+        self.assertEqual(
+            self.client.get(url.replace('/resize/', '/resize/x')).status_code,
+            404
+        )
+        spec = '100x100.jpeg'
+        response = self.client.get(
+            f'/resize/{signature(spec, self.path)}/{spec}/{self.path}'
+        )
+        self.assertEqual(response.status_code, 404)
+        with self.assertRaises(ValueError):
+            resized_url(self.path, '100x100')
+
+    def test_concurrent_requests_render_once(self):
+        """Одновременные запросы одного варианта создают его один раз."""
+        original = resize.render
+
+        def slow_render(*args):
+            time.sleep(0.2)
+            original(*args)
+
+        patcher = mock.patch('core.resize.render', side_effect=slow_render)
+        render = patcher.start()
+        self.addCleanup(patcher.stop)
+        threads = [
+            threading.Thread(
+                target=resized_file, args=(self.path, '480x170.png')
+            )
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(render.call_count, 1)
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.post = Post.objects.create(author=cls.user, text='test-text')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_page_served_from_cache(self):
+        """Повторный анонимный запрос отдаётся из кэша без запросов к БД,
+        а шапка дорисовывается фрагментом.
+        """
+        url = reverse('posts:index')
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'miss')
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertContains(response, 'test-text')
+        self.assertContains(response, 'Войти')
+        self.assertNotIn('<!--hole:', response.content.decode())
+
+    def test_logged_in_user_bypasses_cache(self):
+        """Пользователь с сессией не получает страницу из кэша."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        self.client.get(url)
+        self.client.force_login(self.user)
+        response = self.client.get(url)
+        self.assertNotIn('X-Page-Cache', response)
+        self.assertContains(response, 'Добавить комментарий')
+        self.assertContains(response, 'csrfmiddlewaretoken')
+
+    def test_changes_reset_cache(self):
+        """Новый пост сразу виден в закэшированной ленте."""
+        url = reverse('posts:index')
+        self.client.get(url)
+        Post.objects.create(author=self.user, text='new-text')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'new-text')
+
+    def test_version_not_reused_after_eviction(self):
+        """После вытеснения ключа версия не повторяет прежние."""
+        first = page_cache.version()
+        page_cache.bump_version()
+        cache.delete(page_cache.VERSION_KEY)
+        page_cache.bump_version()
+        self.assertIsNotNone(cache.get(page_cache.VERSION_KEY))
+        self.assertGreaterEqual(page_cache.version(), first)
+        self.assertGreater(page_cache.version(), 2)
+
+
+class StaleWhileRevalidateTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def expire(self, key):
+        entry = cache.get(key)
+        entry['expires'] = time.time() - 1
+        cache.set(key, entry)
+
+    def test_fresh_value_is_not_recomputed(self):
+        get_or_compute('key', lambda: 'old', 60)
+        compute = mock.Mock(return_value='new')
+        self.assertEqual(get_or_compute('key', compute, 60, beta=0), 'old')
+        compute.assert_not_called()
+
+    def test_stale_value_served_while_locked(self):
+        """Пока значение пересчитывает другой процесс, отдаётся
+        устаревшее.
+        """
+        get_or_compute('key', lambda: 'old', 60)
+        self.expire('key')
+        acquire('key')
+        compute = mock.Mock(return_value='new')
+        self.assertEqual(get_or_compute('key', compute, 60), 'old')
+        compute.assert_not_called()
+
+    def test_expired_value_recomputed_by_lock_holder(self):
+        get_or_compute('key', lambda: 'old', 60)
+        self.expire('key')
+        self.assertEqual(get_or_compute('key', lambda: 'new', 60), 'new')
+        self.assertEqual(get_or_compute('key', lambda: 'other', 60), 'new')
+
+    def test_early_expiration(self):
+        """Долго вычисляемое значение пересчитывается до срока."""
+        cache.set('key', {
+            'value': 'old', 'expires': time.time() + 1, 'delta': 10
+        })
+        with mock.patch('core.swr.random.random', return_value=0.5):
+            self.assertEqual(get_or_compute('key', lambda: 'new', 60), 'new')
+
+    def test_concurrent_misses_compute_once(self):
+        """Одновременные промахи вычисляют значение один раз."""
+        def compute():
+            time.sleep(0.2)
+            return 'value'
+
+        compute = mock.Mock(side_effect=compute)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                get_or_compute('key', compute, 60)
+            ))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['value'] * 4)
+        self.assertEqual(compute.call_count, 1)
+
+    def test_template_tag(self):
+        template = Template(
+            '{% load swrcache %}{% swrcache 60 fragment key %}'
+            '{{ value }}{% endswrcache %}'
+        )
+        self.assertEqual(
+            template.render(Context({'key': 1, 'value': 'old'})), 'old'
+        )
+        self.assertEqual(
+            template.render(Context({'key': 1, 'value': 'new'})), 'old'
+        )
+        self.assertEqual(
+            template.render(Context({'key': 2, 'value': 'new'})), 'new'
+        )
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def view(self, request):
+        self.calls += 1
+        time.sleep(0.2)
+        return HttpResponse(f'page {self.calls}')
+
+    def run_concurrently(self, view, requests):
+        responses = [None] * len(requests)
+
+        def run(index):
+            responses[index] = view(requests[index])
+
+        threads = [
+            threading.Thread(target=run, args=(index,))
+            for index in range(len(requests))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return responses
+
+    def test_identical_requests_share_response(self):
+        """Одновременные одинаковые запросы выполняют представление
+        один раз.
+        """
+        factory = RequestFactory()
+        view = single_flight.single_flight(self.view)
+        responses = self.run_concurrently(
+            view, [factory.get('/') for _ in range(4)]
+        )
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(
+            {response.content for response in responses}, {b'page 1'}
+        )
+        self.assertEqual(
+            single_flight.metrics(),
+            {'computed': 1, 'coalesced': 3, 'shared': 0}
+        )
+
+    def test_requests_with_session_not_coalesced(self):
+        factory = RequestFactory()
+        factory.cookies['sessionid'] = 'session'
+        view = single_flight.single_flight(self.view)
+        self.run_concurrently(view, [factory.get('/') for _ in range(2)])
+        self.assertEqual(self.calls, 2)
+
+    def test_response_shared_across_workers(self):
+        """Ответ ведущего другого процесса берётся из общего кэша."""
+        view = single_flight.single_flight(self.view)
+        with mock.patch.dict(SINGLE_FLIGHT, {'SHARED': True}):
+            view(RequestFactory().get('/'))
+            with mock.patch('core.single_flight.cache.add') as add:
+                add.return_value = False
+                response = view(RequestFactory().get('/'))
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(response.content, b'page 1')
+        self.assertEqual(single_flight.metrics()['shared'], 1)
+
+
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(tiers.clear)
+
+    def make_cache(self, location, **options):
+        options = {
+            'L2': 'shared',
+            'L1_PREFIXES': ['hot:'],
+            'SYNC_INTERVAL': 0,
+            'MAX_ENTRIES': 100,
+            **options,
+        }
+        return TwoTierCache(location, {'OPTIONS': options})
+
+    def test_hot_keys_read_from_process_memory(self):
+        """Ключи L1 читаются без обращения к общему кэшу."""
+        two_tier = self.make_cache('first', SYNC_INTERVAL=60)
+        two_tier.set('hot:group', 'value')
+        two_tier.set('cold:group', 'value')
+        with mock.patch.object(
+            type(two_tier.l2), 'get', side_effect=AssertionError
+        ):
+            self.assertEqual(two_tier.get('hot:group'), 'value')
+        self.assertEqual(two_tier.get('cold:group'), 'value')
+        stats = two_tier.stats()
+        self.assertEqual(stats['l1_hits'], 1)
+        self.assertEqual(stats['l2_hits'], 1)
+
+    def test_write_in_other_process_invalidates_l1(self):
+        """Перезапись в другом процессе сбрасывает ключ в L1."""
+        first = self.make_cache('first')
+        second = self.make_cache('second')
+        first.set('hot:key', 'old')
+        self.assertEqual(second.get('hot:key'), 'old')
+        first.set('hot:key', 'new')
+        self.assertEqual(second.get('hot:key'), 'new')
+        first.delete('hot:key')
+        self.assertIsNone(second.get('hot:key'))
+
+    def test_unrelated_writes_keep_other_l1(self):
+        """Запись новых и других ключей не сбрасывает L1 другого
+        процесса.
+        """
+        first = self.make_cache('first')
+        second = self.make_cache('second')
+        first.set('hot:a', 'a')
+        self.assertEqual(second.get('hot:a'), 'a')
+        self.assertIsNone(first.get('hot:b'))
+        first.set('hot:b', 'b')
+        first.set_many({'hot:c': 'c', 'cold:d': 'd'})
+        first.delete('hot:c')
+        hits = second.stats()['l1_hits']
+        self.assertEqual(second.get('hot:a'), 'a')
+        self.assertEqual(second.stats()['l1_hits'], hits + 1)
+        first.set('hot:a', 'new')
+        self.assertEqual(second.get('hot:a'), 'new')
+
+    def test_l1_is_bounded(self):
+        """L1 вытесняет давно не использованные ключи."""
+        two_tier = self.make_cache('first', MAX_ENTRIES=2, SYNC_INTERVAL=60)
+        for key in ('hot:a', 'hot:b', 'hot:c'):
+            two_tier.set(key, key)
+        self.assertEqual(len(two_tier.tier.entries), 2)
+        self.assertEqual(two_tier.get_many(['hot:a', 'hot:c']), {
+            'hot:a': 'hot:a', 'hot:c': 'hot:c'
+        })
+        self.assertEqual(two_tier.stats()['l2_hits'], 1)
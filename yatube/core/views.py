@@ -1,4 +1,23 @@
+import mimetypes
+import os
+import stat
+from concurrent import futures
+from urllib.parse import quote
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseNotModified, StreamingHttpResponse)
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.http import parse_http_date_safe
+from django.views.decorators.http import require_safe
+from PIL import Image
+
+from yatube.settings import IMAGE_RESIZE, MEDIA_ROOT, MEDIA_SERVE
+
+from .media import (etag_matches, file_etag, file_last_modified, iter_range,
+                    parse_range, range_applies)
+from .resize import resized_file, valid_signature
 
 
 def page_not_found(request, exception):
@@ -15,3 +34,119 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def too_many_requests(request):
+    return render(request, 'core/429.html', status=429)
+
+
+@require_safe
+def media(request, path):
+    """Отдаёт файл из MEDIA_ROOT с поддержкой Range и условных запросов."""
+    try:
+        full_path = safe_join(MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    return serve_file(request, full_path, path, MEDIA_SERVE['MAX_AGE'])
+
+
+@require_safe
+def resize(request, signature, spec, path):
+    """Отдаёт вариант картинки из MEDIA_ROOT по подписанной ссылке,
+    создавая его при первом запросе.
+    """
+    if not valid_signature(signature, spec, path):
+        raise Http404
+    try:
+        full_path = resized_file(path, spec)
+    except futures.TimeoutError:
+        # Вариант ещё создаётся, запрос можно повторить позже.
+        response = HttpResponse(status=503)
+        response['Retry-After'] = IMAGE_RESIZE['TIMEOUT']
+        return response
+    except (
+        SuspiciousFileOperation,
+        ValueError,
+        OSError,
+        Image.DecompressionBombError,
+    ):
+        raise Http404
+    return serve_file(
+        request,
+        full_path,
+        os.path.relpath(full_path, MEDIA_ROOT),
+        IMAGE_RESIZE['MAX_AGE'],
+    )
+
+
+def serve_file(request, full_path, path, max_age):
+    """Ответ с файлом full_path, лежащим в MEDIA_ROOT по пути path.
+
+    При MEDIA_SERVE['ACCEL'] сам файл отдаёт фронтовой прокси по
+    заголовку X-Accel-Redirect (nginx) или X-Sendfile (Apache).
+    """
+    try:
+        info = os.stat(full_path)
+    except OSError:
+        raise Http404
+    if not stat.S_ISREG(info.st_mode):
+        raise Http404
+    etag = file_etag(info)
+    last_modified = file_last_modified(info)
+    content_type = mimetypes.guess_type(full_path)[0]
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    since = parse_http_date_safe(
+        request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+    )
+    if (if_none_match is not None and etag_matches(if_none_match, etag)) or (
+        if_none_match is None
+        and since is not None
+        and int(info.st_mtime) <= since
+    ):
+        response = HttpResponseNotModified()
+    elif MEDIA_SERVE['ACCEL'] == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(
+            MEDIA_SERVE['ACCEL_PREFIX'] + path
+        )
+    elif MEDIA_SERVE['ACCEL'] == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+    else:
+        response = file_response(request, full_path, info, etag)
+        if content_type is not None:
+            response['Content-Type'] = content_type
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    response['Cache-Control'] = f'public, max-age={max_age}'
+    return response
+
+
+def file_response(request, full_path, info, etag):
+    chunk_size = MEDIA_SERVE['CHUNK_SIZE']
+    try:
+        byte_range = None
+        if range_applies(request.META.get('HTTP_IF_RANGE'), etag, info):
+            byte_range = parse_range(
+                request.META.get('HTTP_RANGE', ''), info.st_size
+            )
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{info.st_size}'
+        return response
+    if byte_range is None:
+        response = FileResponse(open(full_path, 'rb'))
+        response.block_size = chunk_size
+        response['Content-Length'] = info.st_size
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            iter_range(
+                open(full_path, 'rb'), start, end - start + 1, chunk_size
+            ),
+            status=206,
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{info.st_size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,63 @@
+"""Асинхронные варианты страниц-лент для ASGI-приложения.
+
+Запросы к базе и отрисовка шаблонов выполняются в пуле потоков
+core.asgi, а независимые запросы одной страницы идут одновременно:
+записи страницы выбираются по slug или username параллельно с поиском
+сообщества или автора, а пост — параллельно с первой страницей
+комментариев. Сами запросы и контекст шаблонов общие с posts.views
+(см. posts.pages).
+"""
+from django.shortcuts import render
+
+from core.asgi import gather, run_sync
+
+from . import pages
+
+
+async def index(request):
+    context = await run_sync(pages.index_context, request)
+    return await run_sync(render, request, 'posts/index.html', context)
+
+
+async def trending(request):
+    page_obj, groups = await gather(*pages.trending_queries(request))
+    context = pages.trending_context(page_obj, groups)
+    return await run_sync(render, request, 'posts/trending.html', context)
+
+
+async def group_posts(request, slug):
+    group, posts = await gather(*pages.group_queries(request, slug))
+    context = await run_sync(pages.group_context, request, group, posts)
+    return await run_sync(render, request, 'posts/group_list.html', context)
+
+
+async def profile(request, username):
+    author, posts, recommendations = await gather(
+        *pages.profile_queries(request, username)
+    )
+    page_obj, following = await gather(
+        *pages.profile_page_queries(request, author, posts)
+    )
+    context = pages.profile_context(
+        author, page_obj, following, recommendations
+    )
+    return await run_sync(render, request, 'posts/profile.html', context)
+
+
+async def post_detail(request, post_id):
+    post, comments = await gather(*pages.post_detail_queries(post_id))
+    context = await run_sync(
+        pages.post_detail_context, request, post, comments
+    )
+    return await run_sync(
+        render, request, 'posts/post_detail.html', context
+    )
+
+
+views = {
+    'posts:index': index,
+    'posts:trending': trending,
+    'posts:group_posts': group_posts,
+    'posts:profile': profile,
+    'posts:post_detail': post_detail,
+}
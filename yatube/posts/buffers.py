@@ -0,0 +1,68 @@
+import atexit
+import threading
+
+from django.db import connection
+
+from core.page_cache import bump_version
+from yatube.settings import COMMENT_BATCH
+
+from .models import Comment
+from .trending import record_comments
+
+
+class CommentBuffer:
+    """Копит новые комментарии и сохраняет их пачками через bulk_create.
+
+    Пачка сохраняется, когда набралось size комментариев или прошло
+    max_wait секунд с момента добавления первого из них. При size == 1
+    комментарий сохраняется сразу.
+    """
+
+    def __init__(self, size, max_wait):
+        self.size = size
+        self.max_wait = max_wait
+        self.comments = []
+        self.lock = threading.Lock()
+        self.timer = None
+
+    def add(self, comment):
+        if self.size <= 1:
+            comment.save()
+            return
+        comment.build_path()
+        with self.lock:
+            self.comments.append(comment)
+            full = len(self.comments) >= self.size
+            if not full and self.timer is None:
+                self.timer = threading.Timer(self.max_wait, self.flush_later)
+                self.timer.daemon = True
+                self.timer.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            comments, self.comments = self.comments, []
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if comments:
+            # bulk_create не отправляет post_save, рейтинги постов
+            # и версию кэша страниц обновляем сами.
+            Comment.objects.bulk_create(comments)
+            record_comments(comment.post_id for comment in comments)
+            bump_version()
+        return comments
+
+    def flush_later(self):
+        try:
+            self.flush()
+        finally:
+            # Таймер работает в своём потоке со своим соединением с БД.
+            connection.close()
+
+
+comment_buffer = CommentBuffer(
+    COMMENT_BATCH['SIZE'], COMMENT_BATCH['MAX_WAIT']
+)
+atexit.register(comment_buffer.flush)
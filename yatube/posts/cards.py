@@ -0,0 +1,49 @@
+"""Кэш разметки карточек постов.
+
+Карточка не зависит от пользователя, поэтому кэшируется по id поста,
+времени его изменения и выводимым данным автора и сообщества: после
+post_edit, переименования автора или сообщества и удаления сообщества
+меняется ключ, и старая разметка просто перестаёт запрашиваться. Карточки
+страницы читаются из кэша одним get_many, недостающие отрисовываются и
+сохраняются одним set_many. Миниатюры для них перед этим находятся
+одним пакетом resolve_thumbnails.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from yatube.settings import POST_CARD
+
+from .thumbnails import resolve_thumbnails
+
+
+def card_key(post):
+    version = int(post.updated_at.timestamp() * 1000000)
+    # Удаление сообщества обнуляет group_id запросом UPDATE, не трогая
+    # updated_at, поэтому данные автора и сообщества входят в ключ.
+    related = [post.author.get_full_name()]
+    if post.group_id is not None:
+        related.append(post.group.slug)
+    digest = hashlib.sha1('\0'.join(related).encode()).hexdigest()[:12]
+    return f'post_card:{post.pk}:{version}:{digest}'
+
+
+def render_cards(posts):
+    """Разметка карточек posts в том же порядке."""
+    posts = list(posts)
+    keys = [card_key(post) for post in posts]
+    cards = cache.get_many(keys)
+    missing = resolve_thumbnails(
+        post for key, post in zip(keys, posts) if key not in cards
+    )
+    missing = {
+        card_key(post): render_to_string(
+            'posts/includes/post_card.html', {'post': post}
+        )
+        for post in missing
+    }
+    if missing:
+        cache.set_many(missing, POST_CARD['TIMEOUT'])
+        cards.update(missing)
+    return [cards[key] for key in keys]
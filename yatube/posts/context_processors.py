@@ -0,0 +1,10 @@
+from functools import partial
+
+from .notifications import unread_count
+
+
+def notifications(request):
+    """Количество непрочитанных уведомлений; запрос к базе выполняется,
+    только если шаблон выводит значение.
+    """
+    return {'unread_notifications': partial(unread_count, request.user)}
@@ -0,0 +1,85 @@
+"""Дайджесты новых постов избранных авторов.
+
+Каждому подписчику с адресом почты уходит одно письмо с постами,
+опубликованными после предыдущего дайджеста. Подписки и посты
+выбираются пачками пользователей, а письма отправляются одним вызовом
+бэкенда, который складывает их в очередь.
+"""
+import datetime as dt
+from collections import defaultdict
+
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from yatube.settings import DIGEST
+
+from .models import Digest, Follow, Post, User
+from .utils import batches
+
+
+def build_digests(users, now):
+    """Письма для пачки пользователей users."""
+    default_since = now - dt.timedelta(hours=DIGEST['PERIOD_HOURS'])
+    last_sent = dict(Digest.objects.filter(
+        user__in=users
+    ).values_list('user_id', 'last_sent'))
+    since = {user.pk: last_sent.get(user.pk, default_since) for user in users}
+    following = defaultdict(set)
+    for user_id, author_id in Follow.objects.filter(
+        user__in=users
+    ).values_list('user_id', 'author_id'):
+        following[user_id].add(author_id)
+    authors = set().union(*following.values())
+    posts = Post.objects.filter(
+        author_id__in=authors,
+        pub_date__gt=min(since.values()),
+        pub_date__lte=now,
+    ).select_related('author', 'group').order_by('-pub_date')
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append(post)
+    messages = []
+    for user in users:
+        user_posts = sorted(
+            (
+                post
+                for author_id in following[user.pk]
+                for post in by_author[author_id]
+                if post.pub_date > since[user.pk]
+            ),
+            key=lambda post: post.pub_date,
+            reverse=True,
+        )[:DIGEST['MAX_POSTS']]
+        if user_posts:
+            messages.append(EmailMessage(
+                subject='Новые посты ваших авторов',
+                body=render_to_string(
+                    'posts/email/digest.txt',
+                    {'user': user, 'posts': user_posts},
+                ),
+                to=[user.email],
+            ))
+    return messages
+
+
+def send_digests(now=None):
+    """Ставит в очередь дайджесты всех подписчиков; возвращает число
+    писем.
+    """
+    now = now or timezone.now()
+    users = User.objects.exclude(email='').filter(
+        follower__isnull=False
+    ).distinct().order_by('pk')
+    connection = get_connection()
+    sent = 0
+    for batch in batches(users):
+        messages = build_digests(batch, now)
+        sent += connection.send_messages(messages) or 0
+        user_ids = [user.pk for user in batch]
+        Digest.objects.filter(user_id__in=user_ids).update(last_sent=now)
+        Digest.objects.bulk_create(
+            [Digest(user_id=pk, last_sent=now) for pk in user_ids],
+            ignore_conflicts=True,
+        )
+    return sent
@@ -0,0 +1,82 @@
+"""Кэш графа подписок.
+
+Для каждого пользователя в общем кэше хранится отсортированный массив
+id авторов, на которых он подписан (array типа 'q' в виде bytes).
+Проверка подписки — двоичный поиск по массиву без запросов к базе.
+Подписка и отписка сбрасывают массив пользователя.
+"""
+from array import array
+from bisect import bisect_left
+
+from django.core.cache import cache
+from django.db import transaction
+
+from yatube.settings import FOLLOW_GRAPH_TIMEOUT
+
+from .models import Follow
+
+TYPECODE = 'q'
+
+
+def following_cache_key(user_id):
+    return f'following:{user_id}'
+
+
+def load_following(user_id):
+    """Читает подписки пользователя из базы и кладёт их в кэш."""
+    author_ids = array(TYPECODE, Follow.objects.filter(
+        user_id=user_id
+    ).order_by('author_id').values_list('author_id', flat=True))
+    store_following(user_id, author_ids)
+    return author_ids
+
+
+def store_following(user_id, author_ids):
+    cache.set(
+        following_cache_key(user_id),
+        author_ids.tobytes(),
+        FOLLOW_GRAPH_TIMEOUT
+    )
+
+
+def get_following(user_id):
+    """Отсортированный массив id авторов, на которых подписан user_id."""
+    raw = cache.get(following_cache_key(user_id))
+    if raw is None:
+        return load_following(user_id)
+    author_ids = array(TYPECODE)
+    author_ids.frombytes(raw)
+    return author_ids
+
+
+def contains(author_ids, author_id):
+    index = bisect_left(author_ids, author_id)
+    return index < len(author_ids) and author_ids[index] == author_id
+
+
+def is_following(user, author):
+    """Подписан ли пользователь user на автора author."""
+    if not user.is_authenticated or user.pk == author.pk:
+        return False
+    return contains(get_following(user.pk), author.pk)
+
+
+def following_among(user, author_ids):
+    """Подмножество author_ids, на которых подписан user."""
+    if not user.is_authenticated:
+        return set()
+    following = get_following(user.pk)
+    return {pk for pk in author_ids if contains(following, pk)}
+
+
+def forget_following(user_id):
+    """Сбрасывает кэш подписок пользователя после подписки или отписки.
+
+    Массив не правится на месте: get → изменение → set двух
+    одновременных подписок теряет одну из них. Следующее чтение соберёт
+    его из базы заново. Повторное удаление после коммита убирает массив,
+    который успел прочитать из базы запрос, не видевший изменения.
+    """
+    key = following_cache_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
@@ -0,0 +1,15 @@
+from django.template.loader import render_to_string
+
+from core.page_cache import fragment
+
+from .forms import CommentForm
+
+
+@fragment('comment_form')
+def comment_form(request, post_id):
+    """Форма комментария с CSRF-токеном; анонимам не выводится."""
+    return render_to_string(
+        'posts/includes/comment_form.html',
+        {'post_id': post_id, 'form': CommentForm()},
+        request,
+    )
@@ -0,0 +1,102 @@
+"""Агрегаты для каталога сообществ.
+
+Количество постов, дата последней публикации и самые активные авторы
+хранятся в GroupStats и пересчитываются командой refresh_group_stats
+только для сообществ, помеченных устаревшими. Страницы каталога
+кэшируются с номером версии, который меняется при любой записи поста
+в сообщество.
+"""
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from yatube.settings import GROUP_STATS
+
+from .models import Group, GroupStats, Post
+from .utils import batches
+
+VERSION_KEY = 'groups_directory:version'
+
+
+def directory_version():
+    # Начальная версия по времени, чтобы после вытеснения ключа
+    # не совпасть с версией уже закэшированных страниц.
+    return cache.get_or_set(VERSION_KEY, int(time.time()), None)
+
+
+def bump_directory_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        directory_version()
+
+
+def invalidate(group_ids):
+    """Помечает статистику сообществ устаревшей."""
+    group_ids = [pk for pk in group_ids if pk is not None]
+    if group_ids:
+        GroupStats.objects.filter(group_id__in=group_ids).update(
+            is_stale=True
+        )
+        bump_directory_version()
+
+
+def refresh(group_ids=None):
+    """Пересчитывает статистику сообществ group_ids (по умолчанию —
+    устаревших). Возвращает число пересчитанных сообществ.
+    """
+    if group_ids is None:
+        group_ids = Group.objects.filter(
+            Q(stats__isnull=True) | Q(stats__is_stale=True)
+        ).values_list('pk', flat=True)
+    group_ids = list(group_ids)
+    for batch in batches(group_ids):
+        refresh_batch(batch)
+    if group_ids:
+        bump_directory_version()
+    return len(group_ids)
+
+
+def refresh_batch(group_ids):
+    # Строки сначала снимаются с пересчёта, а агрегаты считаются после:
+    # invalidate, пришедший во время подсчёта, снова пометит строку
+    # устаревшей, и пометка не потеряется.
+    GroupStats.objects.bulk_create(
+        [GroupStats(group_id=pk) for pk in group_ids],
+        ignore_conflicts=True,
+    )
+    GroupStats.objects.filter(group_id__in=group_ids).update(
+        is_stale=False
+    )
+    posts = Post.objects.filter(group_id__in=group_ids).order_by()
+    totals = {
+        row['group_id']: row
+        for row in posts.values('group_id').annotate(
+            total=Count('pk'), last=Max('pub_date')
+        )
+    }
+    authors = defaultdict(list)
+    rows = posts.values('group_id', 'author__username').annotate(
+        total=Count('pk')
+    ).order_by('group_id', '-total', 'author__username')
+    for row in rows:
+        if len(authors[row['group_id']]) < GROUP_STATS['TOP_AUTHORS']:
+            authors[row['group_id']].append(row['author__username'])
+    now = timezone.now()
+    stats = [
+        GroupStats(
+            group_id=pk,
+            posts_count=totals.get(pk, {}).get('total', 0),
+            last_post_date=totals.get(pk, {}).get('last'),
+            top_authors=','.join(authors[pk])[:255],
+            refreshed=now,
+        )
+        for pk in group_ids
+    ]
+    GroupStats.objects.bulk_update(
+        stats,
+        ['posts_count', 'last_post_date', 'top_authors', 'refreshed'],
+    )
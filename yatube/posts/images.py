@@ -0,0 +1,81 @@
+"""Сведения о картинке поста: размеры, основной цвет и заглушка.
+
+Считаются один раз при загрузке картинки и хранятся в Post, чтобы
+шаблоны выводили width и height без чтения файла, а до загрузки
+картинки показывали её цвет и размытую заглушку.
+"""
+import base64
+import io
+
+from PIL import Image, ImageOps
+
+from yatube.settings import POST_IMAGE
+
+EMPTY = {
+    'image_width': None,
+    'image_height': None,
+    'image_color': '',
+    'image_placeholder': '',
+}
+
+
+def dominant_color(image):
+    """Самый частый цвет уменьшенной картинки в виде #rrggbb."""
+    small = image.convert('RGB')
+    small.thumbnail((64, 64))
+    small = small.quantize(colors=8).convert('RGB')
+    _, color = max(small.getcolors())
+    return '#{:02x}{:02x}{:02x}'.format(*color)
+
+
+def placeholder(image):
+    """Крошечная JPEG-копия картинки в виде data: URI."""
+    small = image.convert('RGB')
+    size = POST_IMAGE['PLACEHOLDER_SIZE']
+    small.thumbnail((size, size))
+    buffer = io.BytesIO()
+    small.save(
+        buffer, 'JPEG', quality=POST_IMAGE['PLACEHOLDER_QUALITY']
+    )
+    data = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/jpeg;base64,{data}'
+
+
+def image_metadata(file):
+    """Словарь значений полей image_* для файла картинки."""
+    with Image.open(file) as image:
+        # Размеры с учётом поворота из EXIF, как у вариантов картинки.
+        image = ImageOps.exif_transpose(image)
+        return {
+            'image_width': image.width,
+            'image_height': image.height,
+            'image_color': dominant_color(image),
+            'image_placeholder': placeholder(image),
+        }
+
+
+def path_metadata(pk, path):
+    """image_metadata для файла по пути; выполняется в дочерних
+    процессах команды backfill_images, поэтому не обращается к базе.
+    """
+    try:
+        return pk, image_metadata(path)
+    except (OSError, ValueError):
+        return pk, None
+
+
+def fill_metadata(post):
+    """Заполняет поля image_* поста по его картинке. Если картинки нет
+    или её не удалось прочитать, поля очищаются.
+    """
+    metadata = None
+    if post.image:
+        post.image.open()
+        try:
+            metadata = image_metadata(post.image)
+        except (OSError, ValueError):
+            pass
+        finally:
+            post.image.seek(0)
+    for field, value in (metadata or EMPTY).items():
+        setattr(post, field, value)
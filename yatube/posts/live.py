@@ -0,0 +1,181 @@
+"""Живое обновление лент через server-sent events.
+
+Сохранение нового поста публикует событие в брокер процесса для лент
+index, group:<id> и author:<id>. Каждое SSE-соединение подписано на
+ленты одной страницы и хранит только счётчики новых постов, поэтому
+буфер соединения ограничен числом лент, а не числом событий. Если
+событий нет, раз в LIVE_UPDATES['HEARTBEAT'] секунд отправляется
+комментарий, чтобы прокси не закрывали соединение.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.utils.module_loading import import_string
+
+from core.asgi import run_sync
+from yatube.settings import LIVE_UPDATES
+
+from .follow_graph import get_following
+
+
+class Subscription:
+    def __init__(self, loop, scopes):
+        self.loop = loop
+        self.scopes = scopes
+        self.pending = 0
+        self.ready = asyncio.Event()
+
+    def notify(self):
+        self.pending += 1
+        self.ready.set()
+
+    async def next(self, timeout):
+        """Количество новых постов; 0, если за timeout их не было."""
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return 0
+        self.ready.clear()
+        pending, self.pending = self.pending, 0
+        return pending
+
+
+class Broker:
+    """Брокер событий в пределах процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = defaultdict(set)
+
+    def subscribe(self, scopes):
+        subscription = Subscription(asyncio.get_running_loop(), scopes)
+        with self.lock:
+            for scope in scopes:
+                self.subscribers[scope].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for scope in subscription.scopes:
+                self.subscribers[scope].discard(subscription)
+                if not self.subscribers[scope]:
+                    del self.subscribers[scope]
+
+    def publish(self, scopes):
+        """Может вызываться из любого потока."""
+        with self.lock:
+            targets = {
+                subscription
+                for scope in scopes
+                for subscription in self.subscribers.get(scope, ())
+            }
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.notify)
+            except RuntimeError:
+                # Цикл событий соединения уже закрыт.
+                pass
+
+
+broker = Broker()
+
+
+def post_scopes(post):
+    scopes = ['index', f'author:{post.author_id}']
+    if post.group_id is not None:
+        scopes.append(f'group:{post.group_id}')
+    return scopes
+
+
+def session_user_id(headers):
+    cookie = SimpleCookie()
+    for name, value in headers:
+        if name == b'cookie':
+            cookie.load(value.decode('latin-1'))
+    morsel = cookie.get(settings.SESSION_COOKIE_NAME)
+    if morsel is None:
+        return None
+    engine = import_string(f'{settings.SESSION_ENGINE}.SessionStore')
+    return engine(morsel.value).get(SESSION_KEY)
+
+
+def feed_scopes(query, headers):
+    """Ленты, на которые подписывается соединение; None, если ленту
+    нельзя определить.
+    """
+    feed = query.get('feed', ['index'])[0]
+    if feed == 'index':
+        return ['index']
+    if feed == 'group':
+        group_id = query.get('group', [''])[0]
+        if group_id.isdigit():
+            return [f'group:{group_id}']
+    if feed == 'follow':
+        user_id = session_user_id(headers)
+        if user_id is not None:
+            return [
+                f'author:{pk}' for pk in get_following(int(user_id))
+            ]
+    return None
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def send_text(send, text):
+    await send({
+        'type': 'http.response.body',
+        'body': text.encode(),
+        'more_body': True,
+    })
+
+
+async def stream(scope, receive, send):
+    """ASGI-обработчик потока событий о новых постах ленты."""
+    query = parse_qs(scope['query_string'].decode('latin-1'))
+    scopes = await run_sync(feed_scopes, query, scope['headers'])
+    if scopes is None:
+        await send({'type': 'http.response.start', 'status': 400})
+        await send({'type': 'http.response.body'})
+        return
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+    await send_text(send, f'retry: {LIVE_UPDATES["RETRY"]}\n\n')
+    subscription = broker.subscribe(scopes)
+    disconnected = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        while True:
+            events = asyncio.ensure_future(
+                subscription.next(LIVE_UPDATES['HEARTBEAT'])
+            )
+            await asyncio.wait(
+                {events, disconnected},
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if disconnected.done():
+                events.cancel()
+                return
+            count = events.result()
+            if count:
+                data = json.dumps({'count': count})
+                await send_text(send, f'event: posts\ndata: {data}\n\n')
+            else:
+                await send_text(send, ': ping\n\n')
+    finally:
+        broker.unsubscribe(subscription)
+        disconnected.cancel()
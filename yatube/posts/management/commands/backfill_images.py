@@ -0,0 +1,60 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from posts.images import path_metadata
+from posts.models import Post
+from posts.utils import batches
+
+FIELDS = ['image_width', 'image_height', 'image_color', 'image_placeholder']
+
+
+class Command(BaseCommand):
+    help = ('Заполняет размеры, основной цвет и заглушки картинок '
+            'уже опубликованных постов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=os.cpu_count(),
+            help='Количество процессов, обрабатывающих картинки.',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересчитать сведения обо всех картинках.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='')
+        if not options['all']:
+            posts = posts.filter(image_width__isnull=True)
+        items = [
+            (pk, default_storage.path(name))
+            for pk, name in posts.order_by('pk').values_list('pk', 'image')
+        ]
+        done = failed = 0
+        # Соединение с БД не должно переходить в дочерние процессы.
+        connections.close_all()
+        with ProcessPoolExecutor(options['processes']) as pool:
+            for batch in batches(items):
+                updated = []
+                for pk, metadata in pool.map(
+                    path_metadata, *zip(*batch), chunksize=16
+                ):
+                    if metadata is None:
+                        failed += 1
+                        continue
+                    # Новое updated_at сбрасывает кэш карточки поста.
+                    post = Post(pk=pk, updated_at=timezone.now(), **metadata)
+                    updated.append(post)
+                Post.objects.bulk_update(updated, FIELDS + ['updated_at'])
+                done += len(updated)
+        self.stdout.write(
+            f'Обработано картинок: {done}, не удалось прочитать: {failed}.'
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts.recommendations import refresh, refresh_queued
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации «Кого почитать».'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересчитать рекомендации всех пользователей.',
+        )
+
+    def handle(self, *args, **options):
+        if options['all']:
+            count = refresh()
+        else:
+            count = refresh_queued()
+        self.stdout.write(f'Обновлены рекомендации для {count} польз.')
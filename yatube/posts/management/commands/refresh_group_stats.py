@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts.group_stats import refresh
+from posts.models import Group
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает статистику сообществ для каталога.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересчитать статистику всех сообществ.',
+        )
+
+    def handle(self, *args, **options):
+        group_ids = None
+        if options['all']:
+            group_ids = Group.objects.values_list('pk', flat=True)
+        count = refresh(group_ids)
+        self.stdout.write(f'Пересчитана статистика {count} сообществ.')
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.tasks import enqueue
+from posts.digests import send_digests
+from posts.tasks import send_digests as send_digests_task
+
+
+class Command(BaseCommand):
+    help = 'Отправляет подписчикам дайджесты новых постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--enqueue',
+            action='store_true',
+            help='Поставить рассылку в очередь фоновых задач.',
+        )
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            enqueue(send_digests_task, unique=True)
+            self.stdout.write('Рассылка дайджестов поставлена в очередь.')
+            return
+        count = send_digests()
+        self.stdout.write(f'В очередь добавлено писем: {count}.')
@@ -0,0 +1,65 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:41
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    PostCounter = apps.get_model('posts', 'PostCounter')
+    counters = [PostCounter(scope='index', count=Post.objects.count())]
+    for scope, field in (('group', 'group_id'), ('author', 'author_id')):
+        rows = Post.objects.exclude(**{field: None}).order_by().values(
+            field
+        ).annotate(total=Count('pk'))
+        counters.extend(
+            PostCounter(scope=scope, object_id=row[field], count=row['total'])
+            for row in rows
+        )
+    PostCounter.objects.bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_auto_20211111_1057'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('index', 'Главная страница'), ('group', 'Сообщество'), ('author', 'Автор')], max_length=10, verbose_name='Лента')),
+                ('object_id', models.PositiveIntegerField(default=0, verbose_name='Идентификатор')),
+                ('count', models.IntegerField(default=0, verbose_name='Количество постов')),
+            ],
+            options={
+                'verbose_name': 'Счётчик постов',
+                'verbose_name_plural': 'Счётчики постов',
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='follow',
+            options={'verbose_name': 'Подписка', 'verbose_name_plural': 'Подписки'},
+        ),
+        migrations.AlterModelOptions(
+            name='group',
+            options={'ordering': ['title'], 'verbose_name': 'Сообщество', 'verbose_name_plural': 'Сообщества'},
+        ),
+        migrations.AlterField(
+            model_name='group',
+            name='description',
+            field=models.TextField(verbose_name='Описание группы'),
+        ),
+        migrations.AlterField(
+            model_name='group',
+            name='title',
+            field=models.CharField(max_length=200, verbose_name='Название группы'),
+        ),
+        migrations.AddConstraint(
+            model_name='postcounter',
+            constraint=models.UniqueConstraint(fields=('scope', 'object_id'), name='unique_post_counter'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
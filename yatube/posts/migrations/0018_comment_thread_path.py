@@ -0,0 +1,57 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:43
+
+import datetime as dt
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def fill_paths(apps, schema_editor):
+    Comment = apps.get_model('posts', 'Comment')
+    epoch = dt.datetime(1970, 1, 1, tzinfo=timezone.utc)
+    comments = list(Comment.objects.only('pk', 'created'))
+    for comment in comments:
+        micros = (comment.created - epoch) // dt.timedelta(microseconds=1)
+        comment.path = f'{micros:014x}{comment.pk & 0xffff:04x}/'
+    Comment.objects.bulk_update(comments, ['path'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_comment_post_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Уровень вложенности'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.Comment', verbose_name='Ответ на комментарий'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=255, verbose_name='Путь в ветке'),
+        ),
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'ordering': ['path'], 'verbose_name': 'Комментарий', 'verbose_name_plural': 'Комментарии'},
+        ),
+        # Страницы комментариев сортируются по path, индекс по created
+        # больше ни одному запросу не нужен.
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='posts_comme_post_id_944a68_idx',
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='posts_comme_post_id_abd11d_idx'),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
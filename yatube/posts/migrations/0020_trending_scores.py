@@ -0,0 +1,88 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:47
+
+import math
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Значения TRENDING на момент миграции: её результат не должен
+# зависеть от текущих настроек.
+HALF_LIFE = 60 * 60 * 24
+POST_WEIGHT = 1.0
+COMMENT_WEIGHT = 1.0
+
+
+def fill_scores(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    PostScore = apps.get_model('posts', 'PostScore')
+    GroupScore = apps.get_model('posts', 'GroupScore')
+    decay = math.log(2) / HALF_LIFE
+
+    def add(scores, key, weight, moment):
+        value = math.log(weight) + moment.timestamp() * decay
+        if key in scores:
+            high, low = max(scores[key], value), min(scores[key], value)
+            value = high + math.log1p(math.exp(low - high))
+        scores[key] = value
+
+    post_scores, group_scores, groups = {}, {}, {}
+    for pk, group_id, pub_date in Post.objects.values_list(
+        'pk', 'group_id', 'pub_date'
+    ).iterator():
+        groups[pk] = group_id
+        add(post_scores, pk, POST_WEIGHT, pub_date)
+        if group_id is not None:
+            add(group_scores, group_id, POST_WEIGHT, pub_date)
+    for post_id, created in Comment.objects.exclude(
+        post=None
+    ).values_list('post_id', 'created').iterator():
+        add(post_scores, post_id, COMMENT_WEIGHT, created)
+        if groups.get(post_id) is not None:
+            add(
+                group_scores,
+                groups[post_id],
+                COMMENT_WEIGHT,
+                created
+            )
+    PostScore.objects.bulk_create(
+        PostScore(post_id=pk, score=score)
+        for pk, score in post_scores.items()
+    )
+    GroupScore.objects.bulk_create(
+        GroupScore(group_id=pk, score=score)
+        for pk, score in group_scores.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_recommendations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupScore',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Group', verbose_name='Сообщество')),
+                ('score', models.FloatField(db_index=True, default=0, verbose_name='Рейтинг')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг сообщества',
+                'verbose_name_plural': 'Рейтинги сообществ',
+            },
+        ),
+        migrations.CreateModel(
+            name='PostScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('score', models.FloatField(db_index=True, default=0, verbose_name='Рейтинг')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг поста',
+                'verbose_name_plural': 'Рейтинги постов',
+            },
+        ),
+        migrations.RunPython(fill_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_trending_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group', verbose_name='Сообщество')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Количество постов')),
+                ('last_post_date', models.DateTimeField(blank=True, null=True, verbose_name='Последняя публикация')),
+                ('top_authors', models.CharField(blank=True, max_length=255, verbose_name='Самые активные авторы')),
+                ('is_stale', models.BooleanField(default=True, verbose_name='Требует пересчёта')),
+                ('refreshed', models.DateTimeField(auto_now=True, verbose_name='Пересчитано')),
+            ],
+            options={
+                'verbose_name': 'Статистика сообщества',
+                'verbose_name_plural': 'Статистика сообществ',
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0021_group_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Digest',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='digest', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('last_sent', models.DateTimeField(verbose_name='Отправлен')),
+            ],
+            options={
+                'verbose_name': 'Дайджест',
+                'verbose_name_plural': 'Дайджесты',
+            },
+        ),
+    ]
@@ -1,6 +1,11 @@
+import random
+import time
+
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from yatube.settings import COMMENT_MAX_DEPTH
+
 User = get_user_model()
 
 
@@ -13,6 +18,10 @@ class Post(models.Model):
         'Дата публикации',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -33,6 +42,31 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки',
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота картинки',
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    image_color = models.CharField(
+        'Основной цвет картинки',
+        max_length=7,
+        blank=True,
+        default='',
+        editable=False,
+    )
+    image_placeholder = models.TextField(
+        'Заглушка картинки',
+        blank=True,
+        default='',
+        editable=False,
+    )
 
     class Meta:
         ordering = ['-pub_date']
@@ -42,6 +76,15 @@ class Post(models.Model):
     def __str__(self):
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем исходную группу, чтобы при смене группы
+        # обновить счётчики обеих лент.
+        if 'group_id' in instance.__dict__:
+            instance._loaded_group_id = instance.group_id
+        return instance
+
 
 class Group(models.Model):
     title = models.CharField(
@@ -83,6 +126,59 @@ class Comment(models.Model):
         'Дата комментария',
         auto_now_add=True
     )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='replies',
+        verbose_name='Ответ на комментарий',
+    )
+    path = models.CharField(
+        'Путь в ветке',
+        max_length=255,
+        default='',
+        editable=False,
+    )
+    depth = models.PositiveSmallIntegerField(
+        'Уровень вложенности',
+        default=0,
+        editable=False,
+    )
+
+    class Meta:
+        ordering = ['path']
+        indexes = [models.Index(fields=['post', 'path'])]
+        verbose_name = 'Комментарий'
+        verbose_name_plural = 'Комментарии'
+
+    def __str__(self):
+        return self.text[:15]
+
+    def build_path(self):
+        """Заполняет путь комментария в ветке обсуждения.
+
+        Путь состоит из сегментов фиксированной длины (время создания
+        и случайный суффикс), поэтому сортировка по path выстраивает
+        ветки в хронологическом порядке. Ответы глубже COMMENT_MAX_DEPTH
+        прикрепляются к родителю комментария, на который отвечают.
+        """
+        parent = self.parent
+        if parent is not None and parent.depth >= COMMENT_MAX_DEPTH:
+            parent = self.parent = parent.parent
+        micros = time.time_ns() // 1000
+        segment = f'{micros:014x}{random.getrandbits(16):04x}/'
+        if parent is None:
+            self.path = segment
+            self.depth = 0
+        else:
+            self.path = parent.path + segment
+            self.depth = parent.depth + 1
+
+    def save(self, *args, **kwargs):
+        if not self.path:
+            self.build_path()
+        super().save(*args, **kwargs)
 
 
 class Follow(models.Model):
@@ -103,3 +199,192 @@ class Follow(models.Model):
         ]
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+
+
+class PostCounter(models.Model):
+    INDEX = 'index'
+    GROUP = 'group'
+    AUTHOR = 'author'
+    SCOPES = (
+        (INDEX, 'Главная страница'),
+        (GROUP, 'Сообщество'),
+        (AUTHOR, 'Автор'),
+    )
+    scope = models.CharField('Лента', max_length=10, choices=SCOPES)
+    object_id = models.PositiveIntegerField('Идентификатор', default=0)
+    count = models.IntegerField('Количество постов', default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=['scope', 'object_id'], name='unique_post_counter')
+        ]
+        verbose_name = 'Счётчик постов'
+        verbose_name_plural = 'Счётчики постов'
+
+    def __str__(self):
+        return f'{self.scope}:{self.object_id} = {self.count}'
+
+
+class Recommendation(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Пользователь',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рекомендованный автор',
+    )
+    score = models.FloatField('Оценка', default=0)
+
+    class Meta:
+        ordering = ['-score']
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'author'], name='unique_recommendation')
+        ]
+        indexes = [models.Index(fields=['user', '-score'])]
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+
+
+class RecommendationQueue(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Пользователь',
+    )
+
+    class Meta:
+        verbose_name = 'Пересчёт рекомендаций'
+        verbose_name_plural = 'Пересчёт рекомендаций'
+
+
+class PostScore(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='Пост',
+    )
+    score = models.FloatField('Рейтинг', default=0, db_index=True)
+
+    class Meta:
+        verbose_name = 'Рейтинг поста'
+        verbose_name_plural = 'Рейтинги постов'
+
+
+class GroupScore(models.Model):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='Сообщество',
+    )
+    score = models.FloatField('Рейтинг', default=0, db_index=True)
+
+    class Meta:
+        verbose_name = 'Рейтинг сообщества'
+        verbose_name_plural = 'Рейтинги сообществ'
+
+
+class GroupStats(models.Model):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Сообщество',
+    )
+    posts_count = models.PositiveIntegerField('Количество постов', default=0)
+    last_post_date = models.DateTimeField(
+        'Последняя публикация',
+        blank=True,
+        null=True,
+    )
+    top_authors = models.CharField(
+        'Самые активные авторы',
+        max_length=255,
+        blank=True,
+    )
+    is_stale = models.BooleanField('Требует пересчёта', default=True)
+    refreshed = models.DateTimeField('Пересчитано', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Статистика сообщества'
+        verbose_name_plural = 'Статистика сообществ'
+
+    def top_authors_list(self):
+        return [name for name in self.top_authors.split(',') if name]
+
+
+class Digest(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='digest',
+        verbose_name='Пользователь',
+    )
+    last_sent = models.DateTimeField('Отправлен')
+
+    class Meta:
+        verbose_name = 'Дайджест'
+        verbose_name_plural = 'Дайджесты'
+
+
+class Notification(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='+',
+        verbose_name='Последний пост',
+    )
+    count = models.PositiveIntegerField('Количество постов', default=1)
+    is_read = models.BooleanField('Прочитано', default=False)
+    updated = models.DateTimeField('Обновлено', auto_now=True)
+
+    class Meta:
+        ordering = ['-updated']
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'author'],
+            condition=models.Q(is_read=False),
+            name='unique_unread_notification',
+        )]
+        indexes = [models.Index(fields=['user', '-updated'])]
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+
+
+class NotificationCounter(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_counter',
+        verbose_name='Пользователь',
+    )
+    unread = models.PositiveIntegerField('Непрочитанные', default=0)
+
+    class Meta:
+        verbose_name = 'Счётчик уведомлений'
+        verbose_name_plural = 'Счётчики уведомлений'
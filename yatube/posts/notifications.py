@@ -0,0 +1,85 @@
+"""Уведомления подписчиков о новых постах.
+
+Рассылка идёт фоновой задачей пачками по NOTIFICATIONS['BATCH_SIZE']
+подписчиков; каждая задача обрабатывает одну пачку и ставит в очередь
+следующую. Несколько новых постов одного автора схлопываются в одно
+непрочитанное уведомление, а счётчик непрочитанных растёт только при
+появлении нового уведомления.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from yatube.settings import NOTIFICATIONS
+
+from .models import Follow, Notification, NotificationCounter, Post
+
+
+def fan_out(post_id, after=0):
+    """Уведомляет пачку подписчиков автора поста с user_id > after.
+
+    Возвращает user_id последнего подписчика пачки, если за ним могут
+    быть ещё подписчики, иначе None.
+    """
+    post = Post.objects.filter(pk=post_id).only('author_id').first()
+    if post is None:
+        return None
+    size = NOTIFICATIONS['BATCH_SIZE']
+    user_ids = list(Follow.objects.filter(
+        author_id=post.author_id, user_id__gt=after
+    ).order_by('user_id').values_list('user_id', flat=True)[:size])
+    if not user_ids:
+        return None
+    with transaction.atomic():
+        # Уведомления, которые уже указывают на этот пост, учёл
+        # прошлый запуск задачи: повтор не должен считать пост дважды.
+        unread = Notification.objects.filter(
+            user_id__in=user_ids, author_id=post.author_id, is_read=False
+        )
+        collapsed = set(unread.values_list('user_id', flat=True))
+        unread.exclude(post=post).update(
+            count=F('count') + 1, post=post, updated=timezone.now()
+        )
+        new = [pk for pk in user_ids if pk not in collapsed]
+        Notification.objects.bulk_create(
+            [
+                Notification(user_id=pk, author_id=post.author_id, post=post)
+                for pk in new
+            ],
+            ignore_conflicts=True,
+        )
+        NotificationCounter.objects.bulk_create(
+            [NotificationCounter(user_id=pk) for pk in new],
+            ignore_conflicts=True,
+        )
+        NotificationCounter.objects.filter(user_id__in=new).update(
+            unread=F('unread') + 1
+        )
+    if len(user_ids) < size:
+        return None
+    return user_ids[-1]
+
+
+def unread_count(user):
+    if not user.is_authenticated:
+        return 0
+    return NotificationCounter.objects.filter(user=user).values_list(
+        'unread', flat=True
+    ).first() or 0
+
+
+def mark_read(user, notifications, until):
+    """Отмечает прочитанными показанные пользователю уведомления
+    notifications, если они не обновились позже until.
+    """
+    read = Notification.objects.filter(
+        user=user,
+        pk__in=[notification.pk for notification in notifications],
+        is_read=False,
+        updated__lte=until,
+    ).update(is_read=True)
+    if read:
+        NotificationCounter.objects.filter(user=user).update(
+            unread=Greatest(F('unread') - read, 0)
+        )
@@ -0,0 +1,119 @@
+"""Общие части страниц для posts.views и posts.async_views.
+
+Страница собирается по шагам: функции *_queries возвращают независимые
+запросы шага — функции без аргументов, которые синхронное представление
+выполняет через core.parallel.gather, а асинхронное — через
+core.asgi.gather. Функции *_context собирают из их результатов
+контекст шаблона.
+"""
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+
+from yatube.settings import TRENDING
+
+from .follow_graph import is_following
+from .forms import CommentForm
+from .models import Group, GroupScore, Post, User
+from .recommendations import recommended_authors
+from .utils import (assemble_page, comments_page, make_paginator, page_number,
+                    page_slice, paginate)
+
+
+def feed(**filters):
+    """Посты ленты вместе с авторами и сообществами."""
+    return Post.objects.select_related('author', 'group').filter(**filters)
+
+
+def index_context(request):
+    return {
+        'page_obj': paginate(request, feed(), 'index'),
+        'index': True,
+    }
+
+
+def trending_queries(request):
+    post_list = feed(trending__isnull=False).order_by('-trending__score')
+    groups = GroupScore.objects.select_related('group').order_by(
+        '-score'
+    )[:TRENDING['GROUPS_COUNT']]
+    return (
+        # Рейтинг есть у каждого поста, поэтому количество постов
+        # берём из счётчика главной страницы.
+        lambda: paginate(request, post_list, 'index'),
+        lambda: [score.group for score in groups],
+    )
+
+
+def trending_context(page_obj, groups):
+    return {
+        'page_obj': page_obj,
+        'groups': groups,
+        'trending': True,
+    }
+
+
+def group_queries(request, slug):
+    number = page_number(request)
+    return (
+        lambda: get_object_or_404(Group, slug=slug),
+        lambda: page_slice(feed(group__slug=slug), number),
+    )
+
+
+def group_context(request, group, posts):
+    paginator = make_paginator(group.posts.all(), 'group', group.pk)
+    return {
+        'group': group,
+        'page_obj': assemble_page(paginator, page_number(request), posts),
+    }
+
+
+def profile_queries(request, username):
+    number = page_number(request)
+    return (
+        lambda: get_object_or_404(User, username=username),
+        lambda: page_slice(feed(author__username=username), number),
+        lambda: recommended_authors(request.user),
+    )
+
+
+def profile_page_queries(request, author, posts):
+    """Запросы, которым нужен найденный автор."""
+    paginator = make_paginator(author.posts.all(), 'author', author.pk)
+    return (
+        lambda: assemble_page(paginator, page_number(request), posts),
+        lambda: is_following(request.user, author),
+    )
+
+
+def profile_context(author, page_obj, following, recommendations):
+    return {
+        'author': author,
+        'page_obj': page_obj,
+        'following': following,
+        'recommendations': recommendations,
+    }
+
+
+def post_detail_queries(post_id):
+    return (
+        lambda: get_object_or_404(
+            Post.objects.select_related('author', 'group'), pk=post_id
+        ),
+        lambda: comments_page(post_id),
+    )
+
+
+def post_detail_context(request, post, comments):
+    comments, next_cursor = comments
+    author_posts = make_paginator(
+        post.author.posts.all(), 'author', post.author_id
+    )
+    return {
+        'post': post,
+        'author_posts_count': author_posts.count,
+        'comments': comments,
+        'next_cursor': next_cursor,
+        'more_url': reverse('posts:post_comments', args=[post.pk]),
+        'form': CommentForm(request.POST or None),
+    }
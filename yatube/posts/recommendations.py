@@ -0,0 +1,132 @@
+"""Рекомендации «Кого почитать».
+
+Кандидаты для пользователя — авторы, на которых подписаны те, на кого
+подписан он сам (друзья друзей). Оценка кандидата — число таких путей
+в графе подписок, то есть элемент произведения разреженной матрицы
+смежности на саму себя. Граф целиком загружается в память в виде
+списков смежности, и строки произведения считаются только для тех
+пользователей, рекомендации которых нужно обновить.
+"""
+import heapq
+from collections import Counter, defaultdict
+from operator import itemgetter
+
+from django.db import transaction
+
+from yatube.settings import RECOMMENDATIONS_TOP_K
+
+from .follow_graph import following_among
+from .models import Follow, Recommendation, RecommendationQueue, User
+from .utils import BATCH_SIZE, batches
+
+
+def load_graph():
+    """Списки смежности: на кого подписан и кто подписан на каждого."""
+    following = defaultdict(set)
+    followers = defaultdict(set)
+    edges = Follow.objects.values_list('user_id', 'author_id').iterator()
+    for user_id, author_id in edges:
+        following[user_id].add(author_id)
+        followers[author_id].add(user_id)
+    return following, followers
+
+
+def popular_authors(followers, limit):
+    """Самые читаемые авторы с оценкой меньше единицы."""
+    top = heapq.nlargest(
+        limit, ((pk, len(ids)) for pk, ids in followers.items()),
+        key=itemgetter(1)
+    )
+    if not top:
+        return []
+    most = top[0][1] + 1
+    return [(pk, count / most) for pk, count in top]
+
+
+def suggest(user_id, following, popular, top_k=RECOMMENDATIONS_TOP_K):
+    """Top-k рекомендованных авторов для пользователя с оценками."""
+    followed = following.get(user_id, set())
+    scores = Counter()
+    for author_id in followed:
+        scores.update(following.get(author_id, ()))
+    # Пока кандидатов мало, добавляем популярных авторов: их оценка
+    # меньше единицы и не перебивает найденных через подписки.
+    for author_id, score in popular:
+        if len(scores) >= top_k:
+            break
+        scores.setdefault(author_id, score)
+    for author_id in followed | {user_id}:
+        scores.pop(author_id, None)
+    return heapq.nlargest(top_k, scores.items(), key=itemgetter(1))
+
+
+def refresh(user_ids=None):
+    """Пересчитывает рекомендации пользователей user_ids (всех, если
+    не указаны). Возвращает число обработанных пользователей.
+    """
+    following, followers = load_graph()
+    if user_ids is None:
+        user_ids = set(User.objects.values_list('pk', flat=True))
+    else:
+        # Изменение подписок пользователя меняет «друзей друзей»
+        # у всех его подписчиков.
+        user_ids = set(user_ids)
+        for user_id in list(user_ids):
+            user_ids.update(followers.get(user_id, ()))
+    popular = popular_authors(followers, RECOMMENDATIONS_TOP_K * 2)
+    recommendations = [
+        Recommendation(user_id=user_id, author_id=author_id, score=score)
+        for user_id in user_ids
+        for author_id, score in suggest(user_id, following, popular)
+    ]
+    with transaction.atomic():
+        for batch in batches(user_ids):
+            Recommendation.objects.filter(user_id__in=batch).delete()
+        Recommendation.objects.bulk_create(
+            recommendations, batch_size=BATCH_SIZE
+        )
+    return len(user_ids)
+
+
+def refresh_queued():
+    """Пересчитывает рекомендации пользователей из очереди."""
+    user_ids = list(
+        RecommendationQueue.objects.values_list('user_id', flat=True)
+    )
+    if not user_ids:
+        return 0
+    # Очередь очищается до загрузки графа: подписка, сделанная во время
+    # пересчёта, снова поставит пользователя в очередь.
+    for batch in batches(user_ids):
+        RecommendationQueue.objects.filter(user_id__in=batch).delete()
+    try:
+        return refresh(user_ids)
+    except Exception:
+        RecommendationQueue.objects.bulk_create(
+            [RecommendationQueue(user_id=pk) for pk in user_ids],
+            ignore_conflicts=True,
+        )
+        raise
+
+
+def mark_stale(user_id):
+    RecommendationQueue.objects.get_or_create(user_id=user_id)
+
+
+def recommended_authors(user):
+    """Рекомендованные пользователю авторы одним запросом."""
+    if not user.is_authenticated:
+        return []
+    recommendations = list(
+        Recommendation.objects.filter(user=user).select_related(
+            'author'
+        )[:RECOMMENDATIONS_TOP_K]
+    )
+    # Подписки, сделанные после пересчёта, отсекаем по кэшу графа.
+    followed = following_among(
+        user, [item.author_id for item in recommendations]
+    )
+    return [
+        item.author for item in recommendations
+        if item.author_id not in followed
+    ]
@@ -0,0 +1,142 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.page_cache import bump_version
+from core.tasks import enqueue
+
+from .follow_graph import forget_following
+from .group_stats import bump_directory_version, invalidate
+from .images import fill_metadata
+from .live import broker, post_scopes
+from .models import Comment, Follow, Group, Post, PostCounter
+from .recommendations import mark_stale
+from .tasks import refresh_group_stats
+from .trending import (record_comments, record_follow, record_group_change,
+                       record_post)
+from .utils import count_cache_key, update_counters
+
+
+def post_count_keys(post):
+    """Ключи кэша всех лент, в которые попадает пост."""
+    keys = {
+        count_cache_key('index'),
+        count_cache_key('author', post.author_id),
+    }
+    if post.group_id is not None:
+        keys.add(count_cache_key('group', post.group_id))
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    keys.update(count_cache_key('follow', pk) for pk in followers)
+    return keys
+
+
+def post_counter_scopes(post):
+    """Счётчики PostCounter, в которые входит пост."""
+    scopes = [
+        (PostCounter.INDEX, 0),
+        (PostCounter.AUTHOR, post.author_id),
+    ]
+    if post.group_id is not None:
+        scopes.append((PostCounter.GROUP, post.group_id))
+    return scopes
+
+
+def group_stats_changed(group_ids):
+    """Помечает статистику сообществ устаревшей и ставит её пересчёт."""
+    if any(pk is not None for pk in group_ids):
+        invalidate(group_ids)
+        enqueue(refresh_group_stats, unique=True)
+
+
+@receiver(pre_save, sender=Post)
+def post_image_changed(sender, instance, **kwargs):
+    """Сведения о картинке считаются один раз — при её загрузке."""
+    image = instance.image
+    if image and not image._committed:
+        fill_metadata(instance)
+    elif not image and instance.image_width is not None:
+        fill_metadata(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    loaded_group_id = getattr(instance, '_loaded_group_id', None)
+    if created:
+        update_counters(post_counter_scopes(instance), 1)
+        cache.delete_many(post_count_keys(instance))
+        record_post(instance)
+        group_stats_changed([instance.group_id])
+        broker.publish(post_scopes(instance))
+    elif loaded_group_id != instance.group_id:
+        if loaded_group_id is not None:
+            update_counters([(PostCounter.GROUP, loaded_group_id)], -1)
+        if instance.group_id is not None:
+            update_counters([(PostCounter.GROUP, instance.group_id)], 1)
+        cache.delete_many([
+            count_cache_key('group', group_id)
+            for group_id in (loaded_group_id, instance.group_id)
+            if group_id is not None
+        ])
+        group_stats_changed([loaded_group_id, instance.group_id])
+        record_group_change(instance, loaded_group_id)
+    instance._loaded_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    update_counters(post_counter_scopes(instance), -1)
+    cache.delete_many(post_count_keys(instance))
+    group_stats_changed([instance.group_id])
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if created:
+        cache.delete(count_cache_key('groups'))
+    bump_directory_version()
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    PostCounter.objects.filter(
+        scope=PostCounter.GROUP, object_id=instance.pk
+    ).delete()
+    cache.delete_many([
+        count_cache_key('group', instance.pk),
+        count_cache_key('groups'),
+    ])
+    bump_directory_version()
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    cache.delete(count_cache_key('follow', instance.user_id))
+    if created:
+        forget_following(instance.user_id)
+        mark_stale(instance.user_id)
+        record_follow(instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    cache.delete(count_cache_key('follow', instance.user_id))
+    forget_following(instance.user_id)
+    mark_stale(instance.user_id)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created and instance.post_id is not None:
+        record_comments([instance.post_id])
+
+
+def content_changed(sender, **kwargs):
+    """Изменения, видимые анонимным читателям, сбрасывают кэш страниц."""
+    bump_version()
+
+
+for model in (Post, Group, Comment, Follow):
+    post_save.connect(content_changed, sender=model)
+    post_delete.connect(content_changed, sender=model)
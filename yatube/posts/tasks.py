@@ -0,0 +1,36 @@
+from core.models import Task
+from core.tasks import enqueue, task
+
+from . import digests, group_stats, notifications, recommendations
+from .models import Post
+from .thumbnails import post_thumbnail
+
+
+@task('posts.refresh_group_stats', priority=Task.LOW)
+def refresh_group_stats():
+    group_stats.refresh()
+
+
+@task('posts.refresh_recommendations', priority=Task.LOW)
+def refresh_recommendations():
+    recommendations.refresh_queued()
+
+
+@task('posts.warm_thumbnail')
+def warm_thumbnail(post_id):
+    """Создаёт миниатюру картинки поста до первого показа в ленте."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None and post.image:
+        post_thumbnail(post.image)
+
+
+@task('posts.send_digests', priority=Task.LOW)
+def send_digests():
+    digests.send_digests()
+
+
+@task('posts.notify_followers')
+def notify_followers(post_id, after=0):
+    last = notifications.fan_out(post_id, after)
+    if last is not None:
+        enqueue(notify_followers, post_id, after=last)
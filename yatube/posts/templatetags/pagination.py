@@ -0,0 +1,10 @@
+from django import template
+
+from posts.utils import page_window
+
+register = template.Library()
+
+
+@register.filter
+def window(page_obj):
+    return page_window(page_obj.number, page_obj.paginator.num_pages)
@@ -0,0 +1,92 @@
+import asyncio
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TransactionTestCase
+
+from core.asgi import AsyncViews
+from posts.async_views import views
+from posts.models import Comment, Group, Post
+from yatube.settings import PAGINATOR_SETINGS
+
+User = get_user_model()
+
+
+async def not_async(scope, receive, send):
+    raise AssertionError('Запрос должна обработать асинхронная страница')
+
+
+class AsyncViewsTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='TestUser')
+        self.group = Group.objects.create(
+            title='test-title',
+            slug='test-slug',
+            description='test-descrp',
+        )
+        Post.objects.bulk_create(
+            Post(author=self.user, group=self.group, text=f'text_{i}')
+            for i in range(PAGINATOR_SETINGS['PAGE_SIZE'] + 3)
+        )
+        self.application = AsyncViews(views, not_async)
+
+    def get(self, path, query_string=b''):
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(self.application({
+            'type': 'http',
+            'http_version': '1.1',
+            'method': 'GET',
+            'path': path,
+            'query_string': query_string,
+            'headers': [],
+        }, receive, send))
+        return sent[0]['status'], sent[1]['body'].decode()
+
+    def test_async_pages_match_sync_views(self):
+        """Асинхронные страницы отдают то же, что и синхронные."""
+        for path in (
+            '/',
+            '/trending/',
+            f'/group/{self.group.slug}/',
+            f'/profile/{self.user.username}/',
+        ):
+            with self.subTest(path=path):
+                status, content = self.get(path, b'page=2')
+                self.assertEqual(status, 200)
+                expected = self.client.get(path, {'page': 2})
+                for post in expected.context['page_obj']:
+                    self.assertIn(post.text, content)
+
+    def test_out_of_range_page(self):
+        """Номер страницы вне диапазона даёт последнюю страницу."""
+        status, content = self.get(f'/group/{self.group.slug}/', b'page=99')
+        self.assertEqual(status, 200)
+        self.assertIn('text_0<', content)
+
+    def test_missing_author(self):
+        """Несуществующий автор обрабатывается как в WSGI."""
+        status, _ = self.get('/profile/nobody/')
+        self.assertEqual(status, 404)
+
+    def test_post_detail_with_comments(self):
+        """Асинхронная страница поста выводит первую страницу
+        комментариев.
+        """
+        post = Post.objects.first()
+        Comment.objects.create(
+            post=post, author=self.user, text='first-comment'
+        )
+        status, content = self.get(f'/posts/{post.pk}/')
+        self.assertEqual(status, 200)
+        self.assertIn(post.text, content)
+        self.assertIn('first-comment', content)
+        status, _ = self.get('/posts/0/')
+        self.assertEqual(status, 404)
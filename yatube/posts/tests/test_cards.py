@@ -0,0 +1,142 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail.images import ImageFile
+
+from posts.cards import render_cards
+from posts.models import Group, Post
+from posts.thumbnails import post_thumbnail, resolve_thumbnails, thumbnail_name
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+class PostCardsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'text_{i}')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cards_read_with_one_get_many(self):
+        """Карточки страницы читаются из кэша одним запросом."""
+        render_cards(self.posts)
+        with mock.patch.object(
+            cache, 'get_many', wraps=cache.get_many
+        ) as get_many, mock.patch(
+            'posts.cards.render_to_string'
+        ) as render_to_string:
+            cards = render_cards(self.posts)
+        get_many.assert_called_once()
+        render_to_string.assert_not_called()
+        self.assertIn('text_0', cards[0])
+
+    def test_edit_refreshes_card(self):
+        """После редактирования поста карточка отрисовывается заново."""
+        post = self.posts[0]
+        self.client.force_login(self.user)
+        self.client.get(reverse('posts:index'))
+        self.client.post(
+            reverse('posts:post_edit', args=[post.pk]),
+            {'text': 'edited-text'},
+        )
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'edited-text')
+
+    def test_author_and_group_changes_refresh_card(self):
+        """Карточка обновляется после переименования автора и
+        удаления сообщества.
+        """
+        group = Group.objects.create(title='group', slug='old-slug')
+        post = Post.objects.create(author=self.user, text='text', group=group)
+        self.assertIn('old-slug', render_cards([post])[0])
+        group.slug = 'new-slug'
+        group.save()
+        post = Post.objects.select_related('author', 'group').get(pk=post.pk)
+        self.assertIn('new-slug', render_cards([post])[0])
+        group.delete()
+        self.user.first_name = 'Renamed'
+        self.user.save()
+        post = Post.objects.select_related('author', 'group').get(pk=post.pk)
+        card = render_cards([post])[0]
+        self.assertNotIn('new-slug', card)
+        self.assertIn('Renamed', card)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user,
+                text=f'text_{i}',
+                image=SimpleUploadedFile(
+                    name=f'small_{i}.gif',
+                    content=SMALL_GIF,
+                    content_type='image/gif',
+                ),
+            )
+            for i in range(3)
+        ]
+        cls.posts.append(Post.objects.create(author=cls.user, text='text'))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_name_matches_sorl(self):
+        """Имя миниатюры совпадает с тем, что создаёт sorl-thumbnail."""
+        post = self.posts[0]
+        self.assertEqual(
+            thumbnail_name(post.image), post_thumbnail(post.image).name
+        )
+
+    def test_page_resolved_in_one_batch(self):
+        """Миниатюры страницы читаются одним запросом без обращения
+        к хранилищу.
+        """
+        resolve_thumbnails(self.posts)
+        cache.clear()
+        with mock.patch.object(ImageFile, 'exists') as exists:
+            with self.assertNumQueries(1):
+                posts = resolve_thumbnails(self.posts)
+            with self.assertNumQueries(0):
+                resolve_thumbnails(self.posts)
+        exists.assert_not_called()
+        self.assertEqual(
+            posts[0].thumbnail.url, post_thumbnail(posts[0].image).url
+        )
+        self.assertIsNone(posts[-1].thumbnail)
+
+    def test_card_shows_thumbnail(self):
+        """Карточка поста выводит найденную миниатюру."""
+        card = render_cards(self.posts[:1])[0]
+        self.assertIn(post_thumbnail(self.posts[0].image).url, card)
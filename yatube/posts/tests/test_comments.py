@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.page_cache import version
+from posts.buffers import CommentBuffer
+from posts.models import Comment, Post
+from yatube.settings import COMMENT_RATE_LIMIT
+
+User = get_user_model()
+
+
+class AddCommentTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.post = Post.objects.create(author=cls.user, text='test-text')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        # Не оставляем исчерпанный лимит другим тестам.
+        cache.clear()
+
+    def test_comment_to_missing_post(self):
+        """Комментарий к несуществующему посту возвращает 404."""
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk + 1]),
+            {'text': 'comment'}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_comments_rate_limited(self):
+        """Слишком частые комментарии отклоняются со статусом 429."""
+        url = reverse('posts:add_comment', args=[self.post.pk])
+        for _ in range(COMMENT_RATE_LIMIT['CAPACITY']):
+            self.client.post(url, {'text': 'comment'})
+        response = self.client.post(url, {'text': 'comment'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(
+            Comment.objects.count(), COMMENT_RATE_LIMIT['CAPACITY']
+        )
+
+
+class CommentBufferTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.post = Post.objects.create(author=cls.user, text='test-text')
+
+    def comment(self):
+        return Comment(post=self.post, author=self.user, text='comment')
+
+    def test_buffer_flushes_full_batch(self):
+        """Полная пачка комментариев сохраняется одним запросом."""
+        buffer = CommentBuffer(size=3, max_wait=60)
+        buffer.add(self.comment())
+        buffer.add(self.comment())
+        self.assertEqual(Comment.objects.count(), 0)
+        with CaptureQueriesContext(connection) as queries:
+            buffer.add(self.comment())
+        inserts = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('INSERT INTO "posts_comment"')
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(Comment.objects.count(), 3)
+        self.assertFalse(Comment.objects.filter(path='').exists())
+
+    def test_flush_resets_page_cache(self):
+        """Сохранённая пачка сбрасывает кэш страниц с комментариями."""
+        buffer = CommentBuffer(size=2, max_wait=60)
+        before = version()
+        buffer.add(self.comment())
+        buffer.add(self.comment())
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertNotEqual(version(), before)
@@ -0,0 +1,30 @@
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase
+
+from posts.digests import send_digests
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+
+class DigestTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@example.com'
+        )
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def test_digest_contains_new_posts_of_followed_authors(self):
+        """Дайджест содержит только новые посты избранных авторов."""
+        Post.objects.create(author=self.author, text='followed-post')
+        Post.objects.create(author=self.other, text='other-post')
+        self.assertEqual(send_digests(), 1)
+        self.assertEqual(mail.outbox[0].to, ['reader@example.com'])
+        self.assertIn('followed-post', mail.outbox[0].body)
+        self.assertNotIn('other-post', mail.outbox[0].body)
+        self.assertEqual(send_digests(), 0)
@@ -0,0 +1,100 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import Task
+from core.tasks import run_pending
+from posts import group_stats
+from posts.group_stats import directory_version
+from posts.models import Group, GroupStats, Post
+
+User = get_user_model()
+
+
+class GroupDirectoryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.other = User.objects.create_user(username='Other')
+        cls.group = Group.objects.create(
+            title='test-title',
+            slug='test-slug',
+            description='test-descrp',
+        )
+        for author in (cls.user, cls.user, cls.other):
+            Post.objects.create(author=author, text='text', group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_refresh_group_stats(self):
+        """Команда пересчитывает агрегаты сообществ."""
+        call_command('refresh_group_stats', stdout=StringIO())
+        stats = GroupStats.objects.get(group=self.group)
+        self.assertEqual(stats.posts_count, 3)
+        self.assertEqual(stats.top_authors_list(), ['TestUser', 'Other'])
+        self.assertFalse(stats.is_stale)
+
+    def test_post_marks_stats_stale(self):
+        """Новый пост в сообществе помечает статистику устаревшей и
+        сбрасывает кэш каталога."""
+        call_command('refresh_group_stats', stdout=StringIO())
+        version = directory_version()
+        Post.objects.create(author=self.user, text='text', group=self.group)
+        self.assertTrue(GroupStats.objects.get(group=self.group).is_stale)
+        self.assertNotEqual(directory_version(), version)
+
+    def test_delete_and_regroup_refresh_stats(self):
+        """Удаление поста и перенос в другое сообщество ставят пересчёт
+        статистики в очередь."""
+        call_command('refresh_group_stats', stdout=StringIO())
+        other_group = Group.objects.create(title='other', slug='other')
+        post = Post.objects.filter(group=self.group).first()
+        Task.objects.all().delete()
+        post.group = other_group
+        post.save()
+        self.assertTrue(Task.objects.filter(
+            name='posts.refresh_group_stats', status=Task.QUEUED
+        ).exists())
+        run_pending()
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).posts_count, 2
+        )
+        self.assertEqual(
+            GroupStats.objects.get(group=other_group).posts_count, 1
+        )
+        post.delete()
+        run_pending()
+        self.assertEqual(
+            GroupStats.objects.get(group=other_group).posts_count, 0
+        )
+
+    def test_invalidate_during_refresh_keeps_stale(self):
+        """Пометка, пришедшая во время пересчёта, не теряется."""
+        call_command('refresh_group_stats', stdout=StringIO())
+        posts_filter = Post.objects.filter
+
+        def invalidate_and_filter(*args, **kwargs):
+            group_stats.invalidate([self.group.pk])
+            return posts_filter(*args, **kwargs)
+
+        group_stats.invalidate([self.group.pk])
+        with mock.patch.object(
+            group_stats.Post.objects, 'filter',
+            side_effect=invalidate_and_filter
+        ):
+            group_stats.refresh()
+        self.assertTrue(GroupStats.objects.get(group=self.group).is_stale)
+
+    def test_group_list_page(self):
+        """Каталог сообществ выводит статистику."""
+        call_command('refresh_group_stats', stdout=StringIO())
+        response = self.client.get(reverse('posts:group_list'))
+        self.assertEqual(response.context['page_obj'][0], self.group)
+        self.assertContains(response, 'Постов: 3')
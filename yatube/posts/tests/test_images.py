@@ -0,0 +1,99 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostImageMetadataTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def create_post(self):
+        return Post.objects.create(
+            author=self.user,
+            text='test-text',
+            image=SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        )
+
+    def test_metadata_filled_on_upload(self):
+        """Размеры, цвет и заглушка считаются при загрузке картинки."""
+        post = Post.objects.get(pk=self.create_post().pk)
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        self.assertRegex(post.image_color, r'^#[0-9a-f]{6}$')
+        self.assertTrue(
+            post.image_placeholder.startswith('data:image/jpeg;base64,')
+        )
+        post.image = None
+        post.save()
+        post.refresh_from_db()
+        self.assertIsNone(post.image_width)
+        self.assertEqual(post.image_placeholder, '')
+
+    def test_backfill_command(self):
+        """Команда заполняет сведения о картинках старых постов."""
+        post = self.create_post()
+        Post.objects.filter(pk=post.pk).update(
+            image_width=None, image_height=None, image_placeholder=''
+        )
+        out = StringIO()
+        call_command('backfill_images', processes=1, stdout=out)
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        self.assertNotEqual(post.image_placeholder, '')
+        self.assertIn('1', out.getvalue())
+
+    def test_feed_image_has_dimensions(self):
+        """Картинка в ленте выводится с размерами и ленивой загрузкой."""
+        self.create_post()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'width="960"')
+        self.assertContains(response, 'height="339"')
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, 'url(data:image/jpeg;base64,')
+
+    def test_detail_image_uses_stored_dimensions(self):
+        """Картинка поста выводится с сохранёнными размерами без чтения
+        файла.
+        """
+        post = self.create_post()
+        with mock.patch('posts.images.Image.open') as image_open:
+            response = self.client.get(
+                reverse('posts:post_detail', args=[post.pk])
+            )
+        image_open.assert_not_called()
+        self.assertContains(response, '/resize/')
+        self.assertContains(response, 'width="2" height="1"')
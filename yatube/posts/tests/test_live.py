@@ -0,0 +1,102 @@
+import asyncio
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.wsgi import get_wsgi_application
+from django.test import TestCase
+
+from core.asgi import WsgiToAsgi
+from posts.live import feed_scopes, stream
+from posts.models import Follow, Post
+from yatube.settings import LIVE_UPDATES
+
+User = get_user_model()
+
+
+def http_scope(path, query_string=b''):
+    return {
+        'type': 'http',
+        'http_version': '1.1',
+        'method': 'GET',
+        'path': path,
+        'query_string': query_string,
+        'headers': [],
+    }
+
+
+class LiveUpdatesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+
+    def run_stream(self, query_string, action):
+        """Открывает поток, выполняет action и возвращает отправленные
+        клиенту фрагменты тела ответа.
+        """
+        sent = []
+        incoming = asyncio.Queue()
+
+        async def send(message):
+            sent.append(message)
+
+        async def scenario():
+            task = asyncio.ensure_future(stream(
+                http_scope('/events/', query_string), incoming.get, send
+            ))
+            while len(sent) < 2:
+                await asyncio.sleep(0.01)
+            action()
+            await asyncio.sleep(0.05)
+            await incoming.put({'type': 'http.disconnect'})
+            await asyncio.wait_for(task, 1)
+
+        asyncio.run(scenario())
+        self.assertEqual(sent[0]['status'], 200)
+        return [message.get('body', b'').decode() for message in sent[1:]]
+
+    def test_new_post_event(self):
+        """Новый пост публикует событие в ленту главной страницы."""
+        chunks = self.run_stream(
+            b'feed=index',
+            lambda: Post.objects.create(author=self.author, text='text'),
+        )
+        self.assertIn('event: posts\ndata: {"count": 1}\n\n', chunks)
+
+    def test_heartbeat(self):
+        """Без событий поток отправляет комментарии-пинги."""
+        with mock.patch.dict(LIVE_UPDATES, {'HEARTBEAT': 0.01}):
+            chunks = self.run_stream(b'feed=index', lambda: None)
+        self.assertIn(': ping\n\n', chunks)
+
+    def test_follow_feed_scopes(self):
+        """Лента подписок слушает события избранных авторов."""
+        Follow.objects.create(user=self.user, author=self.author)
+        self.client.force_login(self.user)
+        session = self.client.cookies['sessionid'].value
+        headers = [(b'cookie', f'sessionid={session}'.encode())]
+        self.assertEqual(
+            feed_scopes({'feed': ['follow']}, headers),
+            [f'author:{self.author.pk}'],
+        )
+        self.assertIsNone(feed_scopes({'feed': ['follow']}, []))
+
+    def test_wsgi_application_served_over_asgi(self):
+        """Обычные страницы отдаются WSGI-приложением через адаптер."""
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            sent.append(message)
+
+        application = WsgiToAsgi(get_wsgi_application())
+        asyncio.run(application(http_scope('/about/author/'), receive, send))
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn('Об авторе'.encode(), sent[1]['body'])
@@ -0,0 +1,117 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.tasks import enqueue, run_pending
+from posts.models import Follow, Notification, Post
+from posts.notifications import mark_read, unread_count
+from posts.tasks import notify_followers
+from yatube.settings import NOTIFICATIONS, PAGINATOR_SETINGS
+
+User = get_user_model()
+
+
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.followers = [
+            User.objects.create_user(username=f'follower_{i}')
+            for i in range(3)
+        ]
+        for follower in cls.followers:
+            Follow.objects.create(user=follower, author=cls.author)
+
+    def publish(self, text='test-text'):
+        post = Post.objects.create(author=self.author, text=text)
+        enqueue(notify_followers, post.pk)
+        return post
+
+    def test_fan_out_in_batches(self):
+        """Рассылка идёт пачками, пока не уведомлены все подписчики."""
+        self.publish()
+        with mock.patch.dict(NOTIFICATIONS, {'BATCH_SIZE': 2}):
+            while run_pending():
+                pass
+        self.assertEqual(Notification.objects.count(), 3)
+        for follower in self.followers:
+            self.assertEqual(unread_count(follower), 1)
+
+    def test_posts_of_one_author_collapsed(self):
+        """Новые посты автора схлопываются в одно уведомление."""
+        self.publish('first')
+        run_pending()
+        last = self.publish('second')
+        run_pending()
+        notification = Notification.objects.get(user=self.followers[0])
+        self.assertEqual(notification.count, 2)
+        self.assertEqual(notification.post, last)
+        self.assertEqual(unread_count(self.followers[0]), 1)
+
+    def test_inbox_marks_notifications_read(self):
+        """Просмотр уведомлений сбрасывает счётчик непрочитанных."""
+        self.publish()
+        run_pending()
+        follower = self.followers[0]
+        self.client.force_login(follower)
+        response = self.client.get(reverse('posts:notification_list'))
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.assertEqual(unread_count(follower), 0)
+        self.publish()
+        run_pending()
+        self.assertEqual(
+            Notification.objects.filter(user=follower).count(), 2
+        )
+
+    def test_retried_batch_not_counted_twice(self):
+        """Повтор рассылки того же поста не увеличивает счётчики."""
+        post = self.publish()
+        run_pending()
+        enqueue(notify_followers, post.pk)
+        run_pending()
+        notification = Notification.objects.get(user=self.followers[0])
+        self.assertEqual(notification.count, 1)
+        self.assertEqual(unread_count(self.followers[0]), 1)
+
+    def test_notifications_after_render_stay_unread(self):
+        """Уведомление, пришедшее во время отрисовки, не отмечается
+        прочитанным.
+        """
+        follower = self.followers[0]
+        self.publish()
+        run_pending()
+        shown = timezone.now()
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=follower, author=other)
+        post = Post.objects.create(author=other, text='late')
+        enqueue(notify_followers, post.pk)
+        run_pending()
+        mark_read(follower, Notification.objects.filter(user=follower), shown)
+        self.assertEqual(unread_count(follower), 1)
+        self.assertTrue(Notification.objects.filter(
+            user=follower, author=other, is_read=False
+        ).exists())
+
+    def test_other_pages_stay_unread(self):
+        """Уведомления со следующих страниц не отмечаются прочитанными."""
+        follower = self.followers[0]
+        self.publish()
+        run_pending()
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=follower, author=other)
+        post = Post.objects.create(author=other, text='other-text')
+        enqueue(notify_followers, post.pk)
+        run_pending()
+        self.client.force_login(follower)
+        with mock.patch.dict(PAGINATOR_SETINGS, {'PAGE_SIZE': 1}):
+            response = self.client.get(reverse('posts:notification_list'))
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.assertEqual(unread_count(follower), 1)
+        self.assertEqual(
+            Notification.objects.filter(user=follower, is_read=False).count(),
+            1
+        )
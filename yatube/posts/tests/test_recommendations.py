@@ -0,0 +1,80 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import recommendations
+from posts.models import Follow, Recommendation, RecommendationQueue
+
+User = get_user_model()
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user, cls.friend, cls.author, cls.other = (
+            User.objects.create_user(username=name)
+            for name in ('user', 'friend', 'author', 'other')
+        )
+        Follow.objects.create(user=cls.user, author=cls.friend)
+        Follow.objects.create(user=cls.friend, author=cls.author)
+        Follow.objects.create(user=cls.friend, author=cls.other)
+        Follow.objects.create(user=cls.other, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_friends_of_friends_recommended(self):
+        """Рекомендуются авторы, на которых подписаны друзья."""
+        call_command('build_recommendations', '--all', stdout=StringIO())
+        authors = list(Recommendation.objects.filter(
+            user=self.user
+        ).values_list('author__username', flat=True))
+        self.assertEqual(set(authors), {'author', 'other'})
+        self.assertNotIn(
+            self.friend.pk,
+            Recommendation.objects.filter(
+                user=self.user
+            ).values_list('author_id', flat=True)
+        )
+
+    def test_queue_refreshes_followers(self):
+        """Новая подписка ставит пользователя в очередь пересчёта."""
+        RecommendationQueue.objects.all().delete()
+        new_author = User.objects.create_user(username='new_author')
+        Follow.objects.create(user=self.friend, author=new_author)
+        call_command('build_recommendations', stdout=StringIO())
+        self.assertTrue(Recommendation.objects.filter(
+            user=self.user, author=new_author
+        ).exists())
+        self.assertFalse(RecommendationQueue.objects.exists())
+
+    def test_follow_during_refresh_stays_queued(self):
+        """Подписка во время пересчёта не теряется из очереди."""
+        RecommendationQueue.objects.all().delete()
+        recommendations.mark_stale(self.user.pk)
+        load_graph = recommendations.load_graph
+
+        def follow_and_load():
+            Follow.objects.create(user=self.user, author=self.other)
+            return load_graph()
+
+        with mock.patch(
+            'posts.recommendations.load_graph', side_effect=follow_and_load
+        ):
+            recommendations.refresh_queued()
+        self.assertTrue(
+            RecommendationQueue.objects.filter(user=self.user).exists()
+        )
+
+    def test_recommendations_shown_in_follow_index(self):
+        """Рекомендации выводятся на странице избранных авторов."""
+        call_command('build_recommendations', '--all', stdout=StringIO())
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertIn(self.author, response.context['recommendations'])
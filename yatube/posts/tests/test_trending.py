@@ -0,0 +1,63 @@
+import math
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, GroupScore, Post, PostScore
+from posts.trending import add_scores, event_score
+from yatube.settings import TRENDING
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='test-title',
+            slug='test-slug',
+            description='test-descrp',
+        )
+        cls.discussed = Post.objects.create(
+            author=cls.user, text='discussed', group=cls.group
+        )
+        cls.fresh = Post.objects.create(author=cls.user, text='fresh')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_scores_decay_with_time(self):
+        """Вклад события уменьшается вдвое за период полураспада."""
+        old = event_score(2, 0)
+        new = event_score(1, TRENDING['HALF_LIFE'])
+        self.assertAlmostEqual(old, new)
+        self.assertAlmostEqual(add_scores(new, new), new + math.log(2))
+
+    def test_comments_raise_post(self):
+        """Обсуждаемый пост поднимается в ленте популярного."""
+        Comment.objects.create(
+            post=self.discussed, author=self.user, text='comment'
+        )
+        self.assertTrue(PostScore.objects.filter(
+            post=self.discussed
+        ).exists())
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(response.context['page_obj'][0], self.discussed)
+        self.assertEqual(response.context['groups'], [self.group])
+
+    def test_group_change_moves_score(self):
+        """Перенос поста в другое сообщество переносит его вклад."""
+        other = Group.objects.create(title='other', slug='other')
+        Comment.objects.create(
+            post=self.discussed, author=self.user, text='comment'
+        )
+        self.discussed.group = other
+        self.discussed.save()
+        self.assertFalse(GroupScore.objects.filter(group=self.group).exists())
+        self.assertTrue(GroupScore.objects.filter(group=other).exists())
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(response.context['groups'], [other])
@@ -0,0 +1,214 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.follow_graph import following_among, get_following
+from posts.models import Comment, Follow, Group, Post, PostCounter
+from posts.utils import (ApproximateCountPaginator, CachedCountPaginator,
+                         comments_page, count_cache_key, page_window,
+                         thread_page)
+from yatube.settings import COMMENT_MAX_DEPTH, PAGINATOR_SETINGS
+
+User = get_user_model()
+
+
+class PageWindowTests(TestCase):
+    def test_small_page_range_is_not_windowed(self):
+        """При небольшом числе страниц выводятся все номера."""
+        self.assertEqual(page_window(1, 5), [1, 2, 3, 4, 5])
+
+    def test_window_around_current_page(self):
+        """Окно вокруг текущей страницы с пропусками по краям."""
+        self.assertEqual(
+            page_window(500, 10000), [1, None, 498, 499, 500, 501, 502,
+                                      None, 10000]
+        )
+
+    def test_window_near_first_page(self):
+        """Пропуск в одну страницу заменяется её номером."""
+        self.assertEqual(
+            page_window(4, 10000), [1, 2, 3, 4, 5, 6, None, 10000]
+        )
+
+
+class CachedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='test-title',
+            slug='test-slug',
+            description='test-descrp',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_count_is_cached(self):
+        """Количество постов берётся из кэша без запроса к базе."""
+        Post.objects.create(author=self.user, text='test-text')
+        key = count_cache_key('index')
+        CachedCountPaginator(Post.objects.all(), 10, cache_key=key).count
+        with self.assertNumQueries(0):
+            count = CachedCountPaginator(
+                Post.objects.all(), 10, cache_key=key
+            ).count
+        self.assertEqual(count, 1)
+
+    def test_count_invalidated_on_group_change(self):
+        """Смена группы поста сбрасывает счётчик ленты группы."""
+        post = Post.objects.create(author=self.user, text='test-text')
+        key = count_cache_key('group', self.group.pk)
+        paginator = CachedCountPaginator(
+            self.group.posts.all(), 10, cache_key=key
+        )
+        self.assertEqual(paginator.count, 0)
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.group
+        post.save()
+        self.assertIsNone(cache.get(key))
+
+
+class ApproximateCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counter_created_and_maintained(self):
+        """Счётчик создаётся при первом подсчёте и обновляется сигналами."""
+        Post.objects.create(author=self.user, text='test-text')
+        paginator = ApproximateCountPaginator(
+            self.user.posts.all(), 10, PostCounter.AUTHOR, self.user.pk
+        )
+        self.assertEqual(paginator.count, 1)
+        Post.objects.create(author=self.user, text='test-text')
+        counter = PostCounter.objects.get(
+            scope=PostCounter.AUTHOR, object_id=self.user.pk
+        )
+        self.assertEqual(counter.count, 2)
+        self.user.posts.all().delete()
+        counter.refresh_from_db()
+        self.assertEqual(counter.count, 0)
+
+    def test_large_counter_skips_count_query(self):
+        """Для больших лент количество берётся из счётчика."""
+        PostCounter.objects.update_or_create(
+            scope=PostCounter.INDEX, object_id=0, defaults={'count': 5000}
+        )
+        paginator = ApproximateCountPaginator(
+            Post.objects.all(), 10, PostCounter.INDEX
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 5000)
+
+
+class CommentsPageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.post = Post.objects.create(author=cls.user, text='test-text')
+        comments = [
+            Comment(post=cls.post, author=cls.user, text=f'comment_{i}')
+            for i in range(PAGINATOR_SETINGS['COMMENTS_PAGE_SIZE'] + 5)
+        ]
+        for comment in comments:
+            comment.build_path()
+        Comment.objects.bulk_create(comments)
+
+    def test_comments_are_paginated_by_cursor(self):
+        """Комментарии отдаются страницами по курсору без повторов."""
+        first, cursor = comments_page(self.post.pk)
+        self.assertEqual(len(first), PAGINATOR_SETINGS['COMMENTS_PAGE_SIZE'])
+        self.assertIsNotNone(cursor)
+        with self.assertNumQueries(1):
+            second, next_cursor = comments_page(self.post.pk, cursor)
+            [comment.author.username for comment in second]
+        self.assertEqual(len(second), 5)
+        self.assertIsNone(next_cursor)
+        self.assertFalse({c.pk for c in first} & {c.pk for c in second})
+
+    def test_comments_fragment(self):
+        """Фрагмент комментариев доступен по курсору."""
+        _, cursor = comments_page(self.post.pk)
+        response = self.client.get(
+            reverse('posts:post_comments', args=[self.post.pk]),
+            {'after': cursor}
+        )
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertEqual(len(response.context['comments']), 5)
+
+
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.post = Post.objects.create(author=cls.user, text='test-text')
+
+    def reply(self, parent=None, text='reply'):
+        return Comment.objects.create(
+            post=self.post, author=self.user, text=text, parent=parent
+        )
+
+    def test_replies_follow_their_thread(self):
+        """Ответы выводятся сразу после комментария, на который отвечают."""
+        first = self.reply(text='first')
+        second = self.reply(text='second')
+        answer = self.reply(first, 'answer')
+        comments, _ = comments_page(self.post.pk)
+        self.assertEqual(comments, [first, answer, second])
+        replies, _ = thread_page(first)
+        self.assertEqual(replies, [answer])
+
+    def test_depth_is_limited(self):
+        """Ответ глубже допустимого прикрепляется к уровню выше."""
+        comment = self.reply()
+        for _ in range(COMMENT_MAX_DEPTH + 2):
+            comment = self.reply(comment)
+        self.assertEqual(comment.depth, COMMENT_MAX_DEPTH)
+
+    def test_reply_to_comment_of_another_post_rejected(self):
+        """Нельзя ответить на комментарий другого поста."""
+        other = Post.objects.create(author=self.user, text='other')
+        comment = self.reply()
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('posts:add_comment', args=[other.pk]),
+            {'text': 'reply', 'parent': comment.pk}
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Comment.objects.filter(post=other).exists())
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.authors = [
+            User.objects.create_user(username=f'author_{i}')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_following_cache_reset_on_change(self):
+        """Подписка и отписка сбрасывают кэш подписок."""
+        first, second, third = self.authors
+        Follow.objects.create(user=self.user, author=third)
+        self.assertEqual(list(get_following(self.user.pk)), [third.pk])
+        Follow.objects.create(user=self.user, author=first)
+        Follow.objects.filter(user=self.user, author=third).delete()
+        pks = [a.pk for a in self.authors]
+        with self.assertNumQueries(1):
+            self.assertEqual(following_among(self.user, pks), {first.pk})
+        with self.assertNumQueries(0):
+            self.assertEqual(following_among(self.user, pks), {first.pk})
@@ -346,3 +346,19 @@ class PostViewsTests(TestCase):
         )
         first_object = response.context['page_obj']
         self.assertNotEqual(first_object, new_post)
+
+    def test_profile_following_for_current_user(self):
+        '''Кнопка отписки видна только подписанному пользователю'''
+        cache.clear()
+        follower = User.objects.create_user(username='follower')
+        Follow.objects.create(user=follower, author=self.user)
+        profile_url = reverse('posts:profile', args=[self.user.username])
+        response = self.authorized_client.get(profile_url)
+        self.assertFalse(response.context['following'])
+        self.authorized_client.force_login(follower)
+        response = self.authorized_client.get(profile_url)
+        self.assertTrue(response.context['following'])
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', args=[self.user.username]))
+        response = self.authorized_client.get(profile_url)
+        self.assertFalse(response.context['following'])
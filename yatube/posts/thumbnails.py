@@ -0,0 +1,99 @@
+"""Миниатюры картинок постов страницы одним пакетом.
+
+Тег {% thumbnail %} sorl-thumbnail ищет каждую миниатюру отдельно:
+запрос к кэшу KV-store, при промахе — к его таблице в базе и к
+хранилищу. Имя миниатюры зависит только от имени исходной картинки,
+геометрии и опций, поэтому имена всех миниатюр страницы вычисляются
+заранее, кэш KV-store читается одним get_many, а промахи — одним
+запросом к таблице. Хранилище трогается только для миниатюр, которых
+ещё нет: их создаёт get_thumbnail.
+"""
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore
+
+from yatube.settings import POST_IMAGE
+
+
+def thumbnail_options():
+    return {'crop': POST_IMAGE['CROP'], 'upscale': True}
+
+
+def post_thumbnail(image):
+    """Миниатюра картинки поста; создаётся, если её ещё нет."""
+    return get_thumbnail(
+        image, POST_IMAGE['GEOMETRY'], **thumbnail_options()
+    )
+
+
+def thumbnail_name(image):
+    """Имя миниатюры, под которым её сохраняет get_thumbnail."""
+    backend = default.backend
+    source = ImageFile(image)
+    options = thumbnail_options()
+    # Опции дополняются так же, как в ThumbnailBackend.get_thumbnail.
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    return backend._get_thumbnail_filename(
+        source, POST_IMAGE['GEOMETRY'], options
+    )
+
+
+def kvstore_key(name):
+    return add_prefix(ImageFile(name, default.storage).key)
+
+
+def read_kvstore(keys):
+    """Записи KV-store по ключам: кэш, затем таблица для промахов."""
+    if not keys:
+        return {}
+    kv_cache = default.kvstore.cache
+    found = kv_cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        stored = dict(KVStore.objects.filter(
+            key__in=missing
+        ).values_list('key', 'value'))
+        if stored:
+            kv_cache.set_many(
+                stored, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT
+            )
+            found.update(stored)
+    # Отсутствие записи cached_db KVStore кэширует особым значением.
+    return {key: value for key, value in found.items()
+            if isinstance(value, str)}
+
+
+def resolve_thumbnails(posts):
+    """Записывает в post.thumbnail миниатюру картинки каждого поста
+    (None для постов без картинки или с недоступной картинкой)
+    и возвращает posts.
+    """
+    posts = list(posts)
+    keys = {}
+    for post in posts:
+        post.thumbnail = None
+        if post.image:
+            keys[post.pk] = kvstore_key(thumbnail_name(post.image))
+    stored = read_kvstore(list(keys.values()))
+    for post in posts:
+        if post.pk not in keys:
+            continue
+        value = stored.get(keys[post.pk])
+        if value is not None:
+            post.thumbnail = deserialize_image_file(value)
+        else:
+            thumbnail = post_thumbnail(post.image)
+            # Без размеров sorl-thumbnail возвращает миниатюру картинки,
+            # которую не удалось прочитать.
+            post.thumbnail = thumbnail if thumbnail.size else None
+    return posts
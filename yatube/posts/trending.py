@@ -0,0 +1,136 @@
+"""Рейтинг популярных постов и сообществ.
+
+Рейтинг — сумма вкладов событий (публикация, комментарий, новый
+подписчик автора), каждый из которых затухает вдвое за HALF_LIFE.
+Вместо того чтобы пересчитывать затухание всех рейтингов, вклад
+события растёт со временем как exp(t * DECAY): отношение рейтингов
+получается тем же, а хранить приходится только натуральный логарифм
+суммы. Он монотонен, поэтому лента сортируется по индексу на score.
+"""
+import math
+import time
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+
+from yatube.settings import TRENDING
+
+from .models import Comment, GroupScore, Post, PostScore
+
+DECAY = math.log(2) / TRENDING['HALF_LIFE']
+# Остаток меньше этой доли рейтинга — погрешность: вклад комментария
+# считается от времени его создания, а не от времени учёта.
+PRECISION = 1e-6
+
+
+def event_score(weight, timestamp=None):
+    """Логарифм вклада события с весом weight в момент timestamp."""
+    if timestamp is None:
+        timestamp = time.time()
+    return math.log(weight) + timestamp * DECAY
+
+
+def add_scores(first, second):
+    """Логарифм суммы exp(first) + exp(second) без переполнения."""
+    high, low = max(first, second), min(first, second)
+    return high + math.log1p(math.exp(low - high))
+
+
+def subtract_scores(first, second):
+    """Логарифм разности exp(first) - exp(second); None, если она
+    не больше нуля с точностью до PRECISION.
+    """
+    if first - second < PRECISION:
+        return None
+    return first + math.log1p(-math.exp(second - first))
+
+
+def add(model, pk, value):
+    """Добавляет логарифм вклада value к рейтингу объекта pk."""
+    with transaction.atomic():
+        current = model.objects.select_for_update().filter(
+            pk=pk
+        ).values_list('score', flat=True).first()
+        if current is not None:
+            model.objects.filter(pk=pk).update(
+                score=add_scores(current, value)
+            )
+            return
+        try:
+            with transaction.atomic():
+                model.objects.create(pk=pk, score=value)
+        except IntegrityError:
+            # Рейтинг успели создать в параллельном запросе.
+            add(model, pk, value)
+
+
+def subtract(model, pk, value):
+    """Вычитает логарифм вклада value из рейтинга объекта pk."""
+    with transaction.atomic():
+        current = model.objects.select_for_update().filter(
+            pk=pk
+        ).values_list('score', flat=True).first()
+        if current is None:
+            return
+        rest = subtract_scores(current, value)
+        if rest is None:
+            model.objects.filter(pk=pk).delete()
+        else:
+            model.objects.filter(pk=pk).update(score=rest)
+
+
+def bump(model, pk, weight, timestamp=None):
+    """Добавляет вклад события к рейтингу объекта с первичным ключом pk."""
+    add(model, pk, event_score(weight, timestamp))
+
+
+def group_contribution(post):
+    """Логарифм вклада поста и комментариев к нему в рейтинг сообщества."""
+    value = event_score(TRENDING['POST_WEIGHT'], post.pub_date.timestamp())
+    for created in Comment.objects.filter(
+        post=post
+    ).values_list('created', flat=True).iterator():
+        value = add_scores(
+            value, event_score(TRENDING['COMMENT_WEIGHT'], created.timestamp())
+        )
+    return value
+
+
+def record_post(post):
+    timestamp = post.pub_date.timestamp()
+    bump(PostScore, post.pk, TRENDING['POST_WEIGHT'], timestamp)
+    if post.group_id is not None:
+        bump(GroupScore, post.group_id, TRENDING['POST_WEIGHT'], timestamp)
+
+
+def record_group_change(post, old_group_id):
+    """Переносит вклад поста из рейтинга сообщества old_group_id
+    в рейтинг его нового сообщества.
+    """
+    value = group_contribution(post)
+    if old_group_id is not None:
+        subtract(GroupScore, old_group_id, value)
+    if post.group_id is not None:
+        add(GroupScore, post.group_id, value)
+
+
+def record_comments(post_ids):
+    """Учитывает новые комментарии к постам post_ids (с повторами)."""
+    counts = Counter(post_ids)
+    groups = dict(Post.objects.filter(
+        pk__in=counts, group__isnull=False
+    ).values_list('pk', 'group_id'))
+    for post_id, count in counts.items():
+        weight = TRENDING['COMMENT_WEIGHT'] * count
+        bump(PostScore, post_id, weight)
+        if post_id in groups:
+            bump(GroupScore, groups[post_id], weight)
+
+
+def record_follow(author_id):
+    """Новый подписчик поднимает последний пост автора."""
+    post_id = Post.objects.filter(
+        author_id=author_id
+    ).values_list('pk', flat=True).first()
+    if post_id is not None:
+        bump(PostScore, post_id, TRENDING['FOLLOW_WEIGHT'])
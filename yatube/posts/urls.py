@@ -6,9 +6,22 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('trending/', views.trending, name='trending'),
+    path('groups/', views.group_list, name='group_list'),
+    path('events/', views.live_events, name='events'),
     path('group/<slug:slug>/', views.group_posts, name='group_posts'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
+    path(
+        'posts/<int:post_id>/comments/<int:comment_id>/',
+        views.comment_thread,
+        name='comment_thread'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
@@ -17,6 +30,11 @@ urlpatterns = [
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('follow/', views.follow_index, name='follow_index'),
+    path(
+        'notifications/',
+        views.notification_list,
+        name='notification_list'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
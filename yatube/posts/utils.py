@@ -0,0 +1,219 @@
+import re
+
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.db.models import F
+from django.utils.functional import cached_property
+
+from core.swr import get_or_compute
+from yatube.settings import PAGINATOR_SETINGS
+
+from .models import Comment, PostCounter
+
+COUNT_CACHE_PREFIX = 'posts_count'
+# Ограничение SQLite на число параметров в одном запросе.
+BATCH_SIZE = 500
+CURSOR_RE = re.compile(r'^([0-9a-f]{18}/)+$')
+
+
+def count_cache_key(scope, pk=None):
+    """Ключ кэша с количеством объектов в ленте."""
+    if pk is None:
+        return f'{COUNT_CACHE_PREFIX}:{scope}'
+    return f'{COUNT_CACHE_PREFIX}:{scope}:{pk}'
+
+
+class CachedCountPaginator(Paginator):
+    """Паджинатор, который берёт количество объектов из кэша."""
+
+    def __init__(self, object_list, per_page, cache_key=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_key = cache_key
+
+    @cached_property
+    def count(self):
+        if self.cache_key is None:
+            return self.get_count()
+        # Подсчёт большой ленты дорог, поэтому после истечения кэша его
+        # выполняет один процесс, а остальные берут прежнее значение.
+        return get_or_compute(
+            self.cache_key,
+            self.get_count,
+            PAGINATOR_SETINGS['COUNT_CACHE_TIMEOUT'],
+        )
+
+    def get_count(self):
+        return super().count
+
+
+class ApproximateCountPaginator(CachedCountPaginator):
+    """Паджинатор, который берёт количество постов из таблицы
+    счётчиков. Небольшие ленты считаются точно.
+    """
+
+    def __init__(self, object_list, per_page, scope, object_id=0, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.scope = scope
+        self.object_id = object_id
+
+    def get_count(self):
+        counter = PostCounter.objects.filter(
+            scope=self.scope, object_id=self.object_id
+        ).values_list('count', flat=True).first()
+        if (
+            counter is not None
+            and counter >= PAGINATOR_SETINGS['EXACT_COUNT_THRESHOLD']
+        ):
+            return counter
+        count = super().get_count()
+        if counter is None:
+            PostCounter.objects.get_or_create(
+                scope=self.scope,
+                object_id=self.object_id,
+                defaults={'count': count},
+            )
+        elif counter != count:
+            PostCounter.objects.filter(
+                scope=self.scope, object_id=self.object_id
+            ).update(count=count)
+        return count
+
+
+def update_counters(scopes, delta):
+    """Изменяет счётчики постов лент scopes (пары scope, object_id)."""
+    for scope, object_id in scopes:
+        PostCounter.objects.filter(
+            scope=scope, object_id=object_id
+        ).update(count=F('count') + delta)
+
+
+def make_paginator(post_list, scope=None, object_id=None):
+    """Паджинатор ленты scope.
+
+    Количество постов ленты scope кэшируется, а для лент с таблицей
+    счётчиков берётся из PostCounter.
+    """
+    per_page = PAGINATOR_SETINGS['PAGE_SIZE']
+    cache_key = None
+    if scope is not None:
+        cache_key = count_cache_key(scope, object_id)
+    if scope in dict(PostCounter.SCOPES):
+        return ApproximateCountPaginator(
+            post_list,
+            per_page,
+            scope,
+            object_id or 0,
+            cache_key=cache_key,
+        )
+    return CachedCountPaginator(post_list, per_page, cache_key=cache_key)
+
+
+def paginate(request, post_list, scope=None, object_id=None):
+    """Возвращает страницу ленты по номеру из GET-параметра page."""
+    paginator = make_paginator(post_list, scope, object_id)
+    return paginator.get_page(request.GET.get('page'))
+
+
+def page_number(request):
+    page = request.GET.get('page', '')
+    if page.isdigit() and int(page) > 0:
+        return int(page)
+    return 1
+
+
+def page_slice(object_list, number):
+    """Объекты страницы number без подсчёта их общего количества."""
+    per_page = PAGINATOR_SETINGS['PAGE_SIZE']
+    bottom = (number - 1) * per_page
+    return list(object_list[bottom:bottom + per_page])
+
+
+def assemble_page(paginator, number, object_list):
+    """Страница из заранее выбранных объектов page_slice. Если номер
+    страницы вне диапазона, страница выбирается заново.
+    """
+    try:
+        number = paginator.validate_number(number)
+    except InvalidPage:
+        return paginator.get_page(number)
+    return Page(object_list, number, paginator)
+
+
+def page_window(number, num_pages, on_each_side=None, on_ends=None):
+    """Номера страниц для навигации: первые, последние и окно вокруг
+    текущей. None обозначает пропущенный диапазон страниц.
+    """
+    if on_each_side is None:
+        on_each_side = PAGINATOR_SETINGS['ON_EACH_SIDE']
+    if on_ends is None:
+        on_ends = PAGINATOR_SETINGS['ON_ENDS']
+    if num_pages <= (on_each_side + on_ends) * 2 + 1:
+        return list(range(1, num_pages + 1))
+    pages = set(range(1, on_ends + 1))
+    pages.update(range(num_pages - on_ends + 1, num_pages + 1))
+    pages.update(range(
+        max(number - on_each_side, 1),
+        min(number + on_each_side, num_pages) + 1
+    ))
+    window = []
+    previous = 0
+    for page in sorted(pages):
+        if page - previous == 2:
+            window.append(page - 1)
+        elif page - previous > 2:
+            window.append(None)
+        window.append(page)
+        previous = page
+    return window
+
+
+def valid_cursor(cursor):
+    """Курсор комментариев — путь последнего показанного комментария."""
+    if cursor and CURSOR_RE.match(cursor):
+        return cursor
+    return None
+
+
+def comments_slice(comments, cursor):
+    """Следующие COMMENTS_PAGE_SIZE комментариев в порядке веток и курсор
+    следующей страницы (None, если комментариев больше нет).
+    """
+    size = PAGINATOR_SETINGS['COMMENTS_PAGE_SIZE']
+    cursor = valid_cursor(cursor)
+    if cursor is not None:
+        comments = comments.filter(path__gt=cursor)
+    comments = list(
+        comments.select_related('author').order_by('path')[:size + 1]
+    )
+    if len(comments) > size:
+        comments = comments[:size]
+        return comments, comments[-1].path
+    return comments, None
+
+
+def comments_page(post_id, cursor=None):
+    """Страница комментариев поста вместе с ветками ответов."""
+    return comments_slice(
+        Comment.objects.filter(post_id=post_id), cursor
+    )
+
+
+def thread_page(comment, cursor=None):
+    """Страница ветки ответов на комментарий."""
+    # Сегменты пути заканчиваются на '/', а следующий за ним символ
+    # в ASCII — '0', поэтому ветка занимает диапазон путей
+    # [path, path без '/' + '0') и выбирается по индексу (post, path).
+    return comments_slice(
+        Comment.objects.filter(
+            post_id=comment.post_id,
+            path__gt=comment.path,
+            path__lt=comment.path[:-1] + '0',
+        ),
+        cursor
+    )
+
+
+def batches(items, size=BATCH_SIZE):
+    """Разбивает items на списки не длиннее size."""
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
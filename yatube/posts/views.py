@@ -1,69 +1,119 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
 
-from yatube.settings import PAGINATOR_SETINGS
+from core.parallel import gather
+from core.ratelimit import TokenBucket
+from core.single_flight import single_flight
+from core.tasks import enqueue
+from core.views import too_many_requests
+from yatube.settings import COMMENT_RATE_LIMIT, GROUP_STATS
 
+from . import pages
+from .buffers import comment_buffer
 from .forms import PostForm, CommentForm
+from .group_stats import directory_version
 from .models import Comment, Group, Post, User, Follow
+from .notifications import mark_read
+from .recommendations import recommended_authors
+from .tasks import (notify_followers, refresh_recommendations,
+                    warm_thumbnail)
+from .utils import comments_page, paginate, thread_page
 
+comment_rate_limit = TokenBucket(
+    'comment', COMMENT_RATE_LIMIT['CAPACITY'], COMMENT_RATE_LIMIT['RATE']
+)
 
+
+@single_flight
 def index(request):
     template = 'posts/index.html'
-    post_list = Post.objects.select_related('author').all()
-    index = True
-    paginator = Paginator(post_list, PAGINATOR_SETINGS['PAGE_SIZE'])
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    return render(request, template, pages.index_context(request))
+
+
+@single_flight
+def trending(request):
+    template = 'posts/trending.html'
+    page_obj, groups = gather(*pages.trending_queries(request))
+    context = pages.trending_context(page_obj, groups)
+    return render(request, template, context)
+
+
+def live_events(request):
+    """Поток событий обслуживает ASGI-приложение (posts.live.stream).
+    При запуске через WSGI ответ 204 останавливает переподключения
+    EventSource.
+    """
+    return HttpResponse(status=204)
+
+
+def group_list(request):
+    template = 'posts/groups.html'
+    groups = Group.objects.select_related('stats')
+    page_obj = paginate(request, groups, 'groups')
     context = {
         'page_obj': page_obj,
-        'index': index,
+        'version': directory_version(),
+        'cache_timeout': GROUP_STATS['CACHE_TIMEOUT'],
     }
     return render(request, template, context)
 
 
+@single_flight
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
     template = 'posts/group_list.html'
-    post_list = group.posts.all()
-    paginator = Paginator(post_list, PAGINATOR_SETINGS['PAGE_SIZE'])
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    context = {
-        'group': group,
-        'page_obj': page_obj,
-    }
+    group, posts = gather(*pages.group_queries(request, slug))
+    context = pages.group_context(request, group, posts)
     return render(request, template, context)
 
 
+@single_flight
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
     template = 'posts/profile.html'
-    post_list = author.posts.all()
-    is_following = Follow.objects.filter(author=author).exists()
-    following = False
-    if author != request.user and is_following:
-        following = True
-    paginator = Paginator(post_list, PAGINATOR_SETINGS['PAGE_SIZE'])
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    context = {
-        'author': author,
-        'page_obj': page_obj,
-        'following': following,
-    }
+    author, posts, recommendations = gather(
+        *pages.profile_queries(request, username)
+    )
+    page_obj, following = gather(
+        *pages.profile_page_queries(request, author, posts)
+    )
+    context = pages.profile_context(
+        author, page_obj, following, recommendations
+    )
     return render(request, template, context)
 
 
+@single_flight
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
-    comment = Comment.objects.filter(post=post_id)
-    form = CommentForm(request.POST or None)
+    post, comments = gather(*pages.post_detail_queries(post_id))
+    context = pages.post_detail_context(request, post, comments)
+    return render(request, template, context)
+
+
+def post_comments(request, post_id):
+    """Фрагмент со следующей страницей комментариев поста."""
+    template = 'posts/includes/comments.html'
+    comments, next_cursor = comments_page(post_id, request.GET.get('after'))
+    context = {
+        'post_id': post_id,
+        'comments': comments,
+        'next_cursor': next_cursor,
+        'more_url': request.path,
+    }
+    return render(request, template, context)
+
+
+def comment_thread(request, post_id, comment_id):
+    """Фрагмент с веткой ответов на комментарий."""
+    template = 'posts/includes/comments.html'
+    comment = get_object_or_404(Comment, pk=comment_id, post_id=post_id)
+    comments, next_cursor = thread_page(comment, request.GET.get('after'))
     context = {
-        'post': post,
-        'comments': comment,
-        'form': form
+        'post_id': post_id,
+        'comments': comments,
+        'next_cursor': next_cursor,
+        'more_url': request.path,
     }
     return render(request, template, context)
 
@@ -79,6 +129,9 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        enqueue(notify_followers, post.pk)
+        if post.image:
+            enqueue(warm_thumbnail, post.pk)
         return redirect('posts:profile', request.user.username)
     return render(
         request,
@@ -110,35 +163,63 @@ def post_edit(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
-    post = Post.objects.get(pk=post_id)
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
     form = CommentForm(request.POST or None)
+    parent_id = request.POST.get('parent', '')
+    parent = None
+    if parent_id.isdigit():
+        parent = get_object_or_404(Comment, pk=parent_id, post_id=post_id)
     if form.is_valid():
+        if not comment_rate_limit.consume(request.user.pk):
+            return too_many_requests(request)
         comment = form.save(commit=False)
         comment.author = request.user
-        comment.post = post
-        comment.save()
+        comment.post_id = post_id
+        comment.parent = parent
+        comment_buffer.add(comment)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
+    post_list = Post.objects.filter(
+        author__following__user=request.user
+    ).select_related('author', 'group')
     follow = True
-    paginator = Paginator(post_list, PAGINATOR_SETINGS['PAGE_SIZE'])
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, post_list, 'follow', request.user.pk)
     context = {
         'page_obj': page_obj,
-        'follow': follow
+        'follow': follow,
+        'recommendations': recommended_authors(request.user),
     }
     return render(request, 'posts/follow.html', context)
 
 
+@login_required
+def notification_list(request):
+    notifications = request.user.notifications.select_related(
+        'author', 'post'
+    )
+    shown = timezone.now()
+    page_obj = paginate(request, notifications)
+    response = render(
+        request, 'posts/notifications.html', {'page_obj': page_obj}
+    )
+    # Отмечаем прочитанными после отрисовки, чтобы новые уведомления
+    # были выделены на этой странице. Уведомления других страниц и
+    # обновлённые во время отрисовки пользователь не видел, они
+    # остаются непрочитанными.
+    mark_read(request.user, page_obj.object_list, shown)
+    return response
+
+
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user:
         Follow.objects.get_or_create(user=request.user, author=author)
+        enqueue(refresh_recommendations, unique=True)
     return redirect("posts:profile", username=username)
 
 
@@ -147,4 +228,5 @@ def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user:
         Follow.objects.filter(user=request.user, author=author).delete()
+        enqueue(refresh_recommendations, unique=True)
     return redirect("posts:profile", username=username)
@@ -0,0 +1,30 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named
+``application``. Django 2.2 has no ASGI support of its own, so regular
+requests are served by the WSGI application in a thread pool, while the
+feed pages from posts.async_views and the event stream are handled
+asynchronously, e.g.:
+
+    uvicorn yatube.asgi:application
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+wsgi_application = get_wsgi_application()
+
+from django.urls import reverse  # noqa: E402
+
+from core.asgi import AsyncViews, Router, WsgiToAsgi  # noqa: E402
+from posts.async_views import views  # noqa: E402
+from posts.live import stream  # noqa: E402
+
+application = Router(
+    {reverse('posts:events'): stream},
+    AsyncViews(views, WsgiToAsgi(wsgi_application)),
+)
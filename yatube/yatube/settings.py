@@ -51,12 +51,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.PageCacheMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
@@ -75,6 +77,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'posts.context_processors.notifications',
             ],
         },
     },
@@ -133,14 +136,151 @@ USE_TZ = True
 STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+# Срок кэширования статики без хеша в имени (core.middleware).
+STATIC_SERVE = {
+    'MAX_AGE': 60 * 60,
+}
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'users:logout'
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма складываются в очередь, а отправляет их фоновая задача
+# через MAIL_QUEUE['BACKEND'].
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+MAIL_QUEUE = {
+    'BACKEND': 'django.core.mail.backends.filebased.EmailBackend',
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+}
+# Независимые запросы страниц выполняются параллельно (core.parallel).
+# SQLite выполняет запросы последовательно, поэтому для него выключено.
+PARALLEL_QUERIES = {
+    'ENABLED': DATABASES['default']['ENGINE'] != 'django.db.backends.sqlite3',
+    'THREADS': 8,
+}
+# Пул потоков для синхронного кода под ASGI (core.asgi).
+ASGI = {
+    'THREADS': 8,
+}
+LIVE_UPDATES = {
+    'HEARTBEAT': 15,
+    'RETRY': 5000,
+}
+# Кэш с отдачей устаревшего значения на время пересчёта (core.swr):
+# STALE_TTL — сколько секунд после истечения свежести отдаётся
+# старое значение, BETA — насколько рано начинается пересчёт,
+# LOCK_WAIT — сколько секунд ждать чужого пересчёта, если старого
+# значения нет.
+SWR_CACHE = {
+    'STALE_TTL': 60 * 5,
+    'BETA': 1.0,
+    'LOCK_TIMEOUT': 30,
+    'LOCK_WAIT': 2,
+    'POLL_INTERVAL': 0.05,
+}
+# Кэш целых страниц для анонимных читателей (core.page_cache).
+# Запросы с cookie из BYPASS_COOKIES всегда обрабатываются
+# представлением.
+PAGE_CACHE = {
+    'VIEWS': [
+        'posts:index',
+        'posts:group_posts',
+        'posts:profile',
+        'posts:post_detail',
+    ],
+    'BYPASS_COOKIES': ['sessionid', 'messages'],
+    'TIMEOUT': 60 * 5,
+}
+# Объединение одинаковых одновременных анонимных запросов
+# (core.single_flight). WAIT — сколько секунд ведомый ждёт ответа
+# ведущего в том же процессе. При SHARED ответ передаётся и другим
+# процессам через кэш: он хранится RESULT_TTL секунд, а ведомые ждут
+# его не дольше SHARED_WAIT.
+SINGLE_FLIGHT = {
+    'ENABLED': True,
+    'WAIT': 10,
+    'SHARED': False,
+    'SHARED_WAIT': 2,
+    'RESULT_TTL': 2,
+    'LOCK_TIMEOUT': 10,
+    'POLL_INTERVAL': 0.05,
+}
+# Кэш разметки карточек постов (posts.cards).
+POST_CARD = {
+    'TIMEOUT': 60 * 60 * 24,
+}
+NOTIFICATIONS = {
+    'BATCH_SIZE': 500,
+}
+DIGEST = {
+    'PERIOD_HOURS': 24,
+    'MAX_POSTS': 10,
+}
 
 PAGINATOR_SETINGS = {
-    'PAGE_SIZE': 10
+    'PAGE_SIZE': 10,
+    'ON_EACH_SIDE': 2,
+    'ON_ENDS': 1,
+    'COUNT_CACHE_TIMEOUT': 60 * 5,
+    'EXACT_COUNT_THRESHOLD': 1000,
+    'COMMENTS_PAGE_SIZE': 20,
+}
+
+COMMENT_MAX_DEPTH = 4
+
+# Не больше CAPACITY комментариев подряд, затем один в 1 / RATE секунд.
+COMMENT_RATE_LIMIT = {
+    'CAPACITY': 5,
+    'RATE': 0.2,
+}
+
+# При SIZE > 1 комментарии копятся в памяти процесса и сохраняются
+# пачками через bulk_create не реже, чем раз в MAX_WAIT секунд.
+COMMENT_BATCH = {
+    'SIZE': 1,
+    'MAX_WAIT': 1.0,
+}
+
+FOLLOW_GRAPH_TIMEOUT = 60 * 60 * 24
+
+RECOMMENDATIONS_TOP_K = 5
+
+# Веса событий для рейтинга популярного; вклад события уменьшается
+# вдвое каждые HALF_LIFE секунд.
+TRENDING = {
+    'HALF_LIFE': 60 * 60 * 24,
+    'POST_WEIGHT': 1.0,
+    'COMMENT_WEIGHT': 1.0,
+    'FOLLOW_WEIGHT': 2.0,
+    'GROUPS_COUNT': 5,
+}
+
+GROUP_STATS = {
+    'TOP_AUTHORS': 3,
+    'CACHE_TIMEOUT': 60 * 10,
+}
+
+# Очередь фоновых задач (core.tasks). При ALWAYS_EAGER задачи
+# выполняются сразу в процессе, поставившем их в очередь.
+TASKS = {
+    'ALWAYS_EAGER': False,
+    'WORKERS': 2,
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF': 2,
+    'LOCK_TIMEOUT': 60 * 5,
+    'BATCH_SIZE': 10,
+    'POLL_INTERVAL': 1,
+}
+
+# PLACEHOLDER_SIZE — длинная сторона заглушки картинки в пикселях,
+# она встраивается в страницу как data: URI.
+POST_IMAGE = {
+    'GEOMETRY': '960x339',
+    'CROP': 'center',
+    'PLACEHOLDER_SIZE': 16,
+    'PLACEHOLDER_QUALITY': 40,
 }
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
@@ -151,12 +291,59 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Отдача медиафайлов (core.views.media). ACCEL: None — файл отдаёт
+# Django, 'x-accel-redirect' — nginx из внутреннего location
+# ACCEL_PREFIX, 'x-sendfile' — Apache с mod_xsendfile.
+MEDIA_SERVE = {
+    'ACCEL': None,
+    'ACCEL_PREFIX': '/protected-media/',
+    'CHUNK_SIZE': 64 * 1024,
+    'MAX_AGE': 60 * 60 * 24,
+}
+
+# Варианты картинок по подписанным ссылкам (core.resize). Разрешены
+# только перечисленные размеры, обрезки и форматы; 'webp' можно
+# добавить, если Pillow собран с libwebp. CACHE_DIR — каталог готовых
+# вариантов внутри MEDIA_ROOT, TIMEOUT — сколько секунд запрос ждёт
+# создания варианта.
+IMAGE_RESIZE = {
+    'SIZES': ['960x960', '960x339', '480x170', '320x320'],
+    'CROPS': ['center', 'top', 'bottom'],
+    'FORMATS': ['jpeg', 'png'],
+    'CACHE_DIR': 'resized',
+    'QUALITY': 85,
+    'WORKERS': 2,
+    'TIMEOUT': 30,
+    'MAX_AGE': 60 * 60 * 24 * 365,
+}
 
 
+# default — двухуровневый кэш (core.cache): ключи с префиксами
+# L1_PREFIXES читаются из памяти процесса, остальные — из общего кэша
+# shared. В продакшене shared — memcached или Redis.
 CACHES = {
     'default': {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'default',
+        'OPTIONS': {
+            'L2': 'shared',
+            'MAX_ENTRIES': 1000,
+            'L1_TIMEOUT': 5,
+            'SYNC_INTERVAL': 1,
+            'L1_PREFIXES': [
+                'page_cache:version',
+                'groups_directory:version',
+                'posts_count:',
+                'post_card:',
+                'swr:',
+                'sorl-thumbnail',
+            ],
+        },
+    },
+    'shared': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'LOCATION': 'shared',
+    },
 }
 
 
@@ -1,7 +1,10 @@
+from urllib.parse import urlsplit
+
 from django.contrib import admin
 from django.urls import include, path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from core.views import media, resize
 
 handler404 = 'core.views.page_not_found'
 handler500 = 'core.views.server_error'
@@ -12,12 +15,21 @@ urlpatterns = [
     path('auth/', include('users.urls', namespace='users')),
     path('about/', include('about.urls', namespace='about')),
     path('auth/', include('django.contrib.auth.urls')),
+    path(
+        'resize/<str:signature>/<str:spec>/<path:path>',
+        resize,
+        name='resize',
+    ),
     path('', include('posts.urls', namespace='posts')),
 ]
 
+# Маршрут к файлам строится из MEDIA_URL, чтобы совпадать со ссылками
+# хранилища. Если MEDIA_URL указывает на другой сервер, файлы отдаёт он.
+if not urlsplit(settings.MEDIA_URL).netloc:
+    urlpatterns.insert(0, path(
+        f'{settings.MEDIA_URL.lstrip("/")}<path:path>', media, name='media'
+    ))
+
 if settings.DEBUG:
     import debug_toolbar
     urlpatterns += (path('__debug__/', include(debug_toolbar.urls)),)
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )